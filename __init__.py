@@ -3,85 +3,60 @@
 
 NODE_ID = "DAO_master" 
 
-from .dxf_new import DXFNew
-from .dxf_add_circle import DXFAddCircle
-from .dxf_add_rectangle import DXFAddRectangle
-from .dxf_add_triangle import DXFAddTriangle
-from .dxf_add_line import DXFAddLine
-from .dxf_preview import DXFPreview
-from .dxf_save import DXFSave
-from .dxf_stats import DXFStats
-from .dxf_import import DXFImport
-from .dxf_to_svg import DxfToSvg
-from .svg_style import SvgStyle
-from .svg_boolean import SvgBoolean
-from .svg_preview import SvgPreview
-from .svg_passthrough import SvgPassthrough
-from .dxf_add_rounded_rectangle import DXFAddRoundedRectangle
-from .dxf_add_polygon import DXFAddPolygon
-from .dxf_add_ellipse import DXFAddEllipse
-from .dxf_add_star import DXFAddStar
-from .dxf_transform import DXFTransform
-from .svg_save import SvgSave
-from .convertSVGtoIMG import ConvertSVGtoIMG
-from .convertIMGtoSVG import ConvertIMGtoSVG
+import time
+_T0 = time.perf_counter()
+
+# Les modules des nodes (ezdxf, shapely, svgpathtools, lxml, pyclipper, cairosvg, ...) sont
+# chargés au premier usage via des proxies. Les modules qui déclarent des routes HTTP restent
+# importés au démarrage (routes à déclarer avant le lancement du serveur) ; leurs dépendances
+# lourdes (matplotlib, cv2) y sont elles-mêmes différées.
+from .dao_lazy import lazy_node, add_load_hook
 from .dao_RVB_color_picker import DAORVBColorPicker
 from .dao_text_maker import DAOTextMaker
-from .dao_move import DAOMove
-from .dao_blur import DAOBlur
-from .svg_load import SVGLoad
 from .folder_file_pro import FolderFilePro
-from .path_to_image import PathToImage
-from .load_image_pro import LoadImagePro
-from .dao_clone_grid import DAOCloneGrid
-from .dao_clone_circular import DAOCloneCircular
-from .dao_clone_circular_path import DAOCloneCircularPath
-from .dao_clone_grid_path import DAOCloneGridPath
-from .mosaic_nodes import (
-    MosaicTileExport,
-    MosaicTileAssemble,
-    MosaicAssembleFromFolder,
-)
+
+def _lazy(key, module, class_name):
+    return lazy_node(__name__, module, class_name, key)
 
 # Dictionnaires de mapping
 NODE_CLASS_MAPPINGS = {
-    "DXF New": DXFNew,
-    "DXF Add Circle": DXFAddCircle,
-    "DXF Add Rectangle": DXFAddRectangle,
-    "DXF Add Rounded Rectangle": DXFAddRoundedRectangle,
-    "DXF Add Triangle": DXFAddTriangle,
-    "DXF Add Polygon": DXFAddPolygon,
-    "DXF Add Line": DXFAddLine,
-    "DXF Add Ellipse": DXFAddEllipse,
-    "DXF Add Star": DXFAddStar,
-    "DXF Preview": DXFPreview,
-    "DXF Save": DXFSave,
-    "DXF Stats": DXFStats,
-    "DXF Import": DXFImport,
-    "DXF to SVG": DxfToSvg,
-    "DXF Transform": DXFTransform,
-    "SVG Style": SvgStyle,
-    "SVG Boolean": SvgBoolean,
-    "SVG Preview": SvgPreview,
-    "SVG Passthrough": SvgPassthrough,
-    "SVG Save": SvgSave,
-    "ConvertSVGtoIMG": ConvertSVGtoIMG,
-    "ConvertIMGtoSVG": ConvertIMGtoSVG,
+    "DXF New": _lazy("DXF New", "dxf_new", "DXFNew"),
+    "DXF Add Circle": _lazy("DXF Add Circle", "dxf_add_circle", "DXFAddCircle"),
+    "DXF Add Rectangle": _lazy("DXF Add Rectangle", "dxf_add_rectangle", "DXFAddRectangle"),
+    "DXF Add Rounded Rectangle": _lazy("DXF Add Rounded Rectangle", "dxf_add_rounded_rectangle", "DXFAddRoundedRectangle"),
+    "DXF Add Triangle": _lazy("DXF Add Triangle", "dxf_add_triangle", "DXFAddTriangle"),
+    "DXF Add Polygon": _lazy("DXF Add Polygon", "dxf_add_polygon", "DXFAddPolygon"),
+    "DXF Add Line": _lazy("DXF Add Line", "dxf_add_line", "DXFAddLine"),
+    "DXF Add Ellipse": _lazy("DXF Add Ellipse", "dxf_add_ellipse", "DXFAddEllipse"),
+    "DXF Add Star": _lazy("DXF Add Star", "dxf_add_star", "DXFAddStar"),
+    "DXF Preview": _lazy("DXF Preview", "dxf_preview", "DXFPreview"),
+    "DXF Save": _lazy("DXF Save", "dxf_save", "DXFSave"),
+    "DXF Stats": _lazy("DXF Stats", "dxf_stats", "DXFStats"),
+    "DXF Import": _lazy("DXF Import", "dxf_import", "DXFImport"),
+    "DXF to SVG": _lazy("DXF to SVG", "dxf_to_svg", "DxfToSvg"),
+    "DXF Transform": _lazy("DXF Transform", "dxf_transform", "DXFTransform"),
+    "SVG Style": _lazy("SVG Style", "svg_style", "SvgStyle"),
+    "SVG Boolean": _lazy("SVG Boolean", "svg_boolean", "SvgBoolean"),
+    "SVG Preview": _lazy("SVG Preview", "svg_preview", "SvgPreview"),
+    "SVG Passthrough": _lazy("SVG Passthrough", "svg_passthrough", "SvgPassthrough"),
+    "SVG Save": _lazy("SVG Save", "svg_save", "SvgSave"),
+    "ConvertSVGtoIMG": _lazy("ConvertSVGtoIMG", "convertSVGtoIMG", "ConvertSVGtoIMG"),
+    "ConvertIMGtoSVG": _lazy("ConvertIMGtoSVG", "convertIMGtoSVG", "ConvertIMGtoSVG"),
     "DAO RVB Color Picker": DAORVBColorPicker,
     "DAO Text Maker": DAOTextMaker,
-    "DAO Move": DAOMove,
-    "DAO Blur": DAOBlur,
-    "SVG Load": SVGLoad,
+    "DAO Move": _lazy("DAO Move", "dao_move", "DAOMove"),
+    "DAO Blur": _lazy("DAO Blur", "dao_blur", "DAOBlur"),
+    "SVG Load": _lazy("SVG Load", "svg_load", "SVGLoad"),
     "Folder File Pro": FolderFilePro,
-    "Path To Image": PathToImage,
-    "Load Image Pro": LoadImagePro,
-    "DAO Clone Grid": DAOCloneGrid,
-    "DAO Clone Circular": DAOCloneCircular,
-    "DAO Clone Circular Path": DAOCloneCircularPath,
-    "DAO Clone Grid Path": DAOCloneGridPath,
-    "MosaicTileExport": MosaicTileExport,
-    "MosaicTileAssemble": MosaicTileAssemble,
-    "MosaicAssembleFromFolder": MosaicAssembleFromFolder,
+    "Path To Image": _lazy("Path To Image", "path_to_image", "PathToImage"),
+    "Load Image Pro": _lazy("Load Image Pro", "load_image_pro", "LoadImagePro"),
+    "DAO Clone Grid": _lazy("DAO Clone Grid", "dao_clone_grid", "DAOCloneGrid"),
+    "DAO Clone Circular": _lazy("DAO Clone Circular", "dao_clone_circular", "DAOCloneCircular"),
+    "DAO Clone Circular Path": _lazy("DAO Clone Circular Path", "dao_clone_circular_path", "DAOCloneCircularPath"),
+    "DAO Clone Grid Path": _lazy("DAO Clone Grid Path", "dao_clone_grid_path", "DAOCloneGridPath"),
+    "MosaicTileExport": _lazy("MosaicTileExport", "mosaic_nodes", "MosaicTileExport"),
+    "MosaicTileAssemble": _lazy("MosaicTileAssemble", "mosaic_nodes", "MosaicTileAssemble"),
+    "MosaicAssembleFromFolder": _lazy("MosaicAssembleFromFolder", "mosaic_nodes", "MosaicAssembleFromFolder"),
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -124,9 +99,20 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "MosaicAssembleFromFolder": "Mosaic: Assemble (Folder)",
 }
 
+# Instrumentation optionnelle (DAO_METRICS=1) : temps/mémoire par node, GET /dao/metrics
+from .dao_metrics import metrics_enabled, instrument_nodes, register_routes
+_METRICS = metrics_enabled()
+if _METRICS:
+    # nodes paresseux : instrumentés au chargement de leur module
+    add_load_hook(lambda key, cls: instrument_nodes({key: cls}))
+    instrument_nodes(NODE_CLASS_MAPPINGS)  # nodes déjà importés (les proxies sont ignorés)
+    register_routes()
+
 WEB_DIRECTORY = "./web"
 
 __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS", "WEB_DIRECTORY"]
 
 print(f"### Loading: {NODE_ID}")
-print(f"    - Mapped {len(NODE_CLASS_MAPPINGS)} nodes")
\ No newline at end of file
+print(f"    - Mapped {len(NODE_CLASS_MAPPINGS)} nodes ({(time.perf_counter() - _T0) * 1000:.0f} ms, modules chargés au premier usage)")
+if _METRICS:
+    print("    - Metrics: actif (/dao/metrics)")
@@ -0,0 +1,108 @@
+"""Benchmark du moteur de tamponnage des nodes Clone (clone_utils._stamp_sprites).
+
+Compare, sur des dispositions synthétiques (grilles disjointes ou serrées, anneaux très
+recouvrants, petits et gros sprites), le moteur par runs/bandes à la boucle d'origine
+(un base.alpha_composite par clone) : temps et égalité exacte des canvas et des masques ;
+puis le même moteur rendu par bandes horizontales sur `--workers` threads.
+
+    python benchmarks/bench_clones.py
+    python benchmarks/bench_clones.py --quick --workers 8 --repeat 5
+"""
+import os, sys, time, argparse, importlib, importlib.machinery, importlib.util
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_module(name: str):
+    """Même chargement que bench_mosaic : paquet synthétique, __init__.py non exécuté."""
+    pkg = "dao_master_bench"
+    if pkg not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(pkg, None, is_package=True)
+        spec.submodule_search_locations = [ROOT]
+        sys.modules[pkg] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{pkg}.{name}")
+
+
+def _sprite(size: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    spr = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    spr[..., 3][rng.random((size, size)) < 0.25] = 0
+    return spr
+
+
+def _reference(size, sprite: np.ndarray, xs, ys):
+    """Boucle d'origine : un alpha_composite par clone, union des alphas par tranche."""
+    W, H = size
+    base = Image.new("RGBA", (W, H))
+    mask = np.zeros((H, W), np.uint8)
+    img, alpha = Image.fromarray(sprite, "RGBA"), sprite[..., 3]
+    h, w = alpha.shape
+    for x, y in zip(xs.tolist(), ys.tolist()):
+        base.alpha_composite(img, (x, y))
+        x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, W), min(y + h, H)
+        if x0 < x1 and y0 < y1:
+            np.maximum(mask[y0:y1, x0:x1], alpha[y0 - y:y1 - y, x0 - x:x1 - x], out=mask[y0:y1, x0:x1])
+    return base, mask
+
+
+def _engine(cu, size, sprite: np.ndarray, xs, ys, disjoint: bool, workers: int):
+    base, mask = Image.new("RGBA", size), np.zeros((size[1], size[0]), np.uint8)
+    cu._stamp_sprites(base, [sprite], xs, ys, mask=mask, disjoint=disjoint, workers=workers)
+    return base, mask
+
+
+def _best(fn, repeat: int):
+    """Meilleur temps sur `repeat` exécutions (bruit de mesure) et résultat de la dernière."""
+    best, res = float("inf"), None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        res = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def _cases(cu, quick: bool):
+    k = 4 if quick else 1
+    out = []
+    for n_x, n_y, spr, gap in [(400 // k, 250 // k, 24, 6), (1000 // k, 100 // k, 4, 2), (100 // k, 100 // k, 64, -16)]:
+        step = spr + gap
+        xs, ys = cu._grid_positions(n_x, n_y, step, step, 5, 5, step // 2, 0)
+        size = (n_x * step + step, n_y * step + 10)
+        out.append((f"grille {n_x}x{n_y} {spr}px gap {gap}", size, _sprite(spr, 0), xs, ys,
+                    cu._grid_disjoint(spr, spr, step, step, step // 2, 0)))
+    for count in (2000 // k, 20000 // k):
+        xs, ys = cu._ring_positions(count, 900.0, 0.0, 1024.0, 1024.0, 48, 48)
+        out.append((f"anneau {count} clones 48px", (2048, 2048), _sprite(48, 1), xs, ys, False))
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Moteur de tamponnage des clones vs boucle alpha_composite.")
+    ap.add_argument("--quick", action="store_true", help="petites dispositions")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="threads du rendu par bandes")
+    ap.add_argument("--repeat", type=int, default=3, help="répétitions (meilleur temps retenu)")
+    args = ap.parse_args(argv)
+    cu = _load_module("clone_utils")
+
+    header = (f"{'disposition':<34}{'clones':>9}{'boucle (s)':>12}{'moteur (s)':>12}{'gain':>8}"
+              f"{f'bandes x{args.workers} (s)':>18}{'gain':>8}  exact")
+    print(header)
+    print("-" * len(header))
+    all_ok = True
+    for name, size, spr, xs, ys, disjoint in _cases(cu, args.quick):
+        t_ref, (ref_img, ref_mask) = _best(lambda: _reference(size, spr, xs, ys), args.repeat)
+        t_new, (base, mask) = _best(lambda: _engine(cu, size, spr, xs, ys, disjoint, 1), args.repeat)
+        ok = np.array_equal(np.asarray(base), np.asarray(ref_img)) and np.array_equal(mask, ref_mask)
+        t_par, (base, mask) = _best(lambda: _engine(cu, size, spr, xs, ys, disjoint, args.workers), args.repeat)
+        ok &= np.array_equal(np.asarray(base), np.asarray(ref_img)) and np.array_equal(mask, ref_mask)
+        all_ok &= ok
+        print(f"{name:<34}{len(xs):>9}{t_ref:>12.3f}{t_new:>12.3f}{t_ref / max(t_new, 1e-9):>7.2f}x"
+              f"{t_par:>18.3f}{t_new / max(t_par, 1e-9):>7.2f}x  {ok}")
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Benchmark des conversions IMAGE/MASK <-> PIL partagées (image_utils.py).
+
+Compare les helpers communs à l'ancien chemin recopié dans chaque node
+(numpy() -> clip -> *255 -> astype, puis astype(float32) / 255 au retour) : temps par frame,
+aller-retour uint8, biais de quantification (arrondi vs troncature), remplissage d'un batch
+préalloué (`out=`) et traitement d'un batch complet par _map_frames (1 thread vs pool).
+
+    python benchmarks/bench_image_utils.py
+    python benchmarks/bench_image_utils.py --size 2048 --repeat 10
+"""
+import os, sys, time, argparse, importlib, importlib.machinery, importlib.util
+
+import numpy as np
+import torch
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_module(name: str):
+    """Même chargement que bench_mosaic : paquet synthétique, __init__.py non exécuté."""
+    pkg = "dao_master_bench"
+    if pkg not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(pkg, None, is_package=True)
+        spec.submodule_search_locations = [ROOT]
+        sys.modules[pkg] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{pkg}.{name}")
+
+
+# ---------- ancien chemin (référence) ----------
+
+def _old_tensor_to_pil(img):
+    arr = img[0].detach().cpu().numpy()
+    arr = (np.clip(arr, 0.0, 1.0) * 255.0).astype(np.uint8)
+    return Image.fromarray(arr, "RGBA" if arr.shape[-1] == 4 else "RGB")
+
+
+def _old_pil_to_tensor(img):
+    arr = np.asarray(img).astype(np.float32) / 255.0
+    return torch.from_numpy(arr).unsqueeze(0)
+
+
+def _best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Conversions IMAGE/MASK <-> PIL : ancien chemin vs image_utils.")
+    ap.add_argument("--size", type=int, default=1024, help="côté des frames")
+    ap.add_argument("--batch", type=int, default=8, help="frames du cas batch (out=)")
+    ap.add_argument("--workers", type=int, default=4, help="threads du cas _map_frames")
+    ap.add_argument("--repeat", type=int, default=5, help="répétitions (meilleur temps retenu)")
+    args = ap.parse_args(argv)
+    iu = _load_module("image_utils")
+
+    # aller-retour exact : toute valeur uint8 doit survivre à PIL -> tensor -> PIL
+    levels = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    ramp = Image.fromarray(np.stack([levels] * 3 + [levels[::-1]], axis=-1), "RGBA")
+    new_ok = np.array_equal(np.asarray(iu._image_to_pil(iu._pil_to_image(ramp))), np.asarray(ramp))
+    # biais de quantification sur des flottants quelconques (troncature : -0.5 niveau en moyenne)
+    x = torch.rand(1, 256, 256, 4)
+    ref = x[0].numpy().astype(np.float64) * 255.0
+    bias_new = (np.asarray(iu._image_to_pil(x), np.float64) - ref).mean()
+    bias_old = (np.asarray(_old_tensor_to_pil(x), np.float64) - ref).mean()
+    print(f"aller-retour uint8 exact : {new_ok}   biais moyen (niveaux) : image_utils={bias_new:+.3f}  ancien={bias_old:+.3f}")
+
+    s, rep = args.size, args.repeat
+    rows = []
+    for ch in (3, 4):
+        img = torch.rand(1, s, s, ch)
+        pil = iu._image_to_pil(img)
+        rows.append((f"tensor->PIL C={ch}", _best(lambda: _old_tensor_to_pil(img), rep),
+                     _best(lambda: iu._image_to_pil(img), rep)))
+        rows.append((f"PIL->tensor C={ch}", _best(lambda: _old_pil_to_tensor(pil), rep),
+                     _best(lambda: iu._pil_to_image(pil), rep)))
+
+    # batch : torch.cat de B tensors [1,H,W,C] vs écriture directe dans un buffer préalloué
+    pil = iu._image_to_pil(torch.rand(1, s, s, 4))
+    def old_batch():
+        return torch.cat([_old_pil_to_tensor(pil) for _ in range(args.batch)], dim=0)
+    def new_batch():
+        out = torch.empty(args.batch, s, s, 4)
+        for i in range(args.batch):
+            iu._pil_to_image(pil, out=out[i])
+        return out
+    assert torch.equal(old_batch(), new_batch())
+    rows.append((f"batch x{args.batch} (out=)", _best(old_batch, rep), _best(new_batch, rep)))
+
+    print(f"{'conversion':<22}{'ancien (s)':>12}{'image_utils (s)':>17}{'gain':>8}   [{s}x{s}]")
+    for name, old, new in rows:
+        print(f"{name:<22}{old:>12.4f}{new:>17.4f}{old / max(new, 1e-9):>7.2f}x")
+
+    # batch complet : même traitement PIL par frame, séquentiel vs pool de threads (_map_frames)
+    from PIL import ImageFilter
+    frames = torch.rand(args.batch, s, s, 4)
+    def blur(i):
+        return (iu._image_to_pil(frames, i).filter(ImageFilter.GaussianBlur(4)),)
+    t1 = _best(lambda: iu._map_frames(blur, args.batch, ("IMAGE",), workers=1), rep)
+    tn = _best(lambda: iu._map_frames(blur, args.batch, ("IMAGE",), workers=args.workers), rep)
+    print(f"_map_frames blur x{args.batch} : 1 thread {t1:.4f}s  {args.workers} threads {tn:.4f}s  {t1 / max(tn, 1e-9):.2f}x")
+    return 0 if new_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
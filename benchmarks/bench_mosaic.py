@@ -0,0 +1,228 @@
+"""Benchmark des nodes Mosaic (MosaicTileExport / MosaicTileAssemble / MosaicAssembleFromFolder).
+
+Autonome et hors-ligne (numpy / PIL / torch uniquement) : génère des jeux de tuiles synthétiques
+(grilles, tailles, RGB/RGBA, modes de recouvrement) et mesure pour chaque cas le temps réel,
+le pic de RSS et le débit en tuiles/s. Chaque cas tourne dans un processus neuf pour que le pic
+de RSS lui soit propre.
+
+    python benchmarks/bench_mosaic.py                 # jeu standard
+    python benchmarks/bench_mosaic.py --quick         # petit jeu (vérification rapide)
+    python benchmarks/bench_mosaic.py --only folder --json resultats.json
+    python benchmarks/bench_mosaic.py --only kernels  # chrono des noyaux seuls (alpha-over uint16 vs float)
+"""
+import os, sys, time, json, argparse, tempfile, shutil, importlib, importlib.machinery, importlib.util
+import multiprocessing as mp
+
+import numpy as np
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GRIDS = [(4, 4, 256), (8, 8, 256), (16, 16, 128), (8, 8, 512)]
+GRIDS_QUICK = [(3, 4, 96), (6, 6, 64)]
+BLENDS = ["last", "alpha_over", "feather_linear", "feather_linear_norm", "multiband"]
+BLENDS_QUICK = ["last", "feather_linear_norm"]
+NODES = ["export", "assemble", "folder"]
+SECTIONS = NODES + ["kernels"]
+
+
+def _load_module(name: str):
+    """Importe un module du pack comme sous-module d'un paquet synthétique (imports relatifs
+    résolus) sans exécuter __init__.py, qui a besoin du serveur ComfyUI."""
+    pkg = "dao_master_bench"
+    if pkg not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(pkg, None, is_package=True)
+        spec.submodule_search_locations = [ROOT]
+        sys.modules[pkg] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{pkg}.{name}")
+
+
+def _load_mosaic():
+    return _load_module("mosaic_nodes")
+
+
+def _peak_rss_mb() -> float:
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # octets sur macOS, Ko ailleurs
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return float("nan")
+
+
+def _synthetic(h: int, w: int, channels: int, seed: int) -> np.ndarray:
+    """Dégradés + bruit : se compresse comme une vraie image (ni constant, ni pur bruit)."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    base = np.stack([(xx / max(w - 1, 1)), (yy / max(h - 1, 1)), ((xx + yy) / max(h + w - 2, 1))], axis=-1)
+    img = base * 200 + rng.normal(0, 12, (h, w, 3))
+    if channels == 4:
+        alpha = 255 - 80 * (((xx // 32 + yy // 32) % 2)[..., None])
+        img = np.concatenate([img, alpha], axis=-1)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _alpha_over_float(dst: np.ndarray, src: np.ndarray) -> np.ndarray:
+    """Ancien chemin float32 de mosaic_nodes (base de comparaison pour _alpha_over_u16)."""
+    if dst.shape[2] == 4:
+        Cd = dst[...,:3].astype(np.float32); Ad = (dst[...,3:4].astype(np.float32))/255.0
+    else:
+        Cd = dst.astype(np.float32); Ad = np.ones(dst.shape[:2]+(1,), np.float32)
+    if src.shape[2] == 4:
+        Cs = src[...,:3].astype(np.float32); As = (src[...,3:4].astype(np.float32))/255.0
+    else:
+        Cs = src.astype(np.float32); As = np.ones(src.shape[:2]+(1,), np.float32)
+    Co = Cs + Cd * (1.0 - As)
+    Ao = As + Ad * (1.0 - As)
+    out_rgb = np.clip(Co, 0, 255)
+    if dst.shape[2] == 4:
+        return np.concatenate([out_rgb, np.clip(Ao*255.0, 0, 255)], axis=2).astype(np.uint8)
+    return out_rgb.astype(np.uint8)
+
+
+def _bench_kernels(quick: bool, repeat: int) -> list:
+    """Chronomètre _alpha_over_u16 contre l'ancien chemin float, en place sur une tranche de canvas
+    (la conformité à ±1 niveau est vérifiée par tests/test_alpha_over.py)."""
+    m = _load_mosaic()
+    side = 512 if quick else 2048
+    rng = np.random.default_rng(0)
+    results = []
+    for cd_, cs_ in ((4, 4), (3, 4), (4, 3), (3, 3)):
+        d = rng.integers(0, 256, (side, side, cd_), dtype=np.uint8)
+        s_ = rng.integers(0, 256, (side, side, cs_), dtype=np.uint8)
+        t_f, t_i = [], []
+        for _ in range(max(1, repeat)):
+            patch = d.copy()
+            t0 = time.perf_counter(); patch[:] = _alpha_over_float(patch, s_); t_f.append(time.perf_counter() - t0)
+            patch = d.copy()
+            t0 = time.perf_counter(); m._alpha_over_u16(patch, s_); t_i.append(time.perf_counter() - t0)
+        res = dict(node="kernel", kernel=f"alpha_over dst{cd_}/src{cs_}", side=side,
+                   float_s=round(min(t_f), 4), u16_s=round(min(t_i), 4), speedup=round(min(t_f) / max(min(t_i), 1e-9), 2))
+        print(f"{res['kernel']:<24}{side:>6}px  float {res['float_s']:.4f}s  uint16 {res['u16_s']:.4f}s  x{res['speedup']}")
+        results.append(res)
+    return results
+
+
+def _case_list(quick: bool, only):
+    grids, blends = (GRIDS_QUICK, BLENDS_QUICK) if quick else (GRIDS, BLENDS)
+    cases = []
+    for node in NODES:
+        if only and node not in only:
+            continue
+        for rows, cols, tile in grids:
+            for channels in (3, 4):
+                if node == "export":
+                    cases.append(dict(node=node, rows=rows, cols=cols, tile=tile, channels=channels, blend="-"))
+                    continue
+                for blend in blends:
+                    cases.append(dict(node=node, rows=rows, cols=cols, tile=tile, channels=channels, blend=blend))
+    return cases
+
+
+def _run_case(case: dict, workers: int, repeat: int) -> dict:
+    """Exécuté dans un processus dédié : prépare les données (non chronométré) puis mesure."""
+    import torch
+    m = _load_mosaic()
+    rss0 = _peak_rss_mb()
+    rows, cols, tile, ch = case["rows"], case["cols"], case["tile"], case["channels"]
+    n = rows * cols
+    ov = tile // 8 if case["blend"] not in ("-", "last") else 0
+    work = tempfile.mkdtemp(prefix="dao_bench_")
+    cwd = os.getcwd()
+    os.chdir(work)  # les nodes écrivent dans ./output/tiles
+    try:
+        if case["node"] == "export":
+            img = _synthetic(rows * tile, cols * tile, ch, 0)
+            tensor = torch.from_numpy(img.astype(np.float32) / 255.0).unsqueeze(0)
+            node = m.MosaicTileExport()
+            def run():
+                return node.tile_and_export(tensor, rows, cols, export_workers=workers)
+        elif case["node"] == "assemble":
+            tiles = np.stack([_synthetic(tile, tile, ch, i) for i in range(n)])
+            tensor = torch.from_numpy(tiles.astype(np.float32) / 255.0)
+            node = m.MosaicTileAssemble()
+            def run():
+                return node.assemble(tensor, rows, cols, overlap_x=ov, overlap_y=ov,
+                                     overlap_blend=case["blend"], feather_px=ov)
+        else:
+            src = os.path.join(work, "src")
+            os.makedirs(src)
+            for r in range(rows):
+                for c in range(cols):
+                    Image.fromarray(_synthetic(tile, tile, ch, r * cols + c)).save(
+                        os.path.join(src, f"tile_r{r:03d}_c{c:03d}.png"), compress_level=1)
+            node = m.MosaicAssembleFromFolder()
+            def run():
+                return node.assemble_from_folder(src, "*.png", rows, cols, overlap_x=ov, overlap_y=ov,
+                                                 overlap_blend=case["blend"], feather_px=ov,
+                                                 export=False, workers=workers)
+        times = []
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - t0)
+        best = min(times)
+        return dict(case, seconds=round(best, 4), tiles_per_s=round(n / max(best, 1e-9), 1),
+                    peak_rss_mb=round(_peak_rss_mb(), 1), base_rss_mb=round(rss0, 1))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def _run_isolated(args):
+    case, workers, repeat = args
+    try:
+        return _run_case(case, workers, repeat)
+    except Exception as e:
+        return dict(case, error=f"{type(e).__name__}: {e}")
+
+
+def _bench_nodes(cases: list, workers: int, repeat: int, results: list) -> None:
+    header = f"{'node':<9}{'grille':>9}{'tuile':>7}{'C':>3}  {'blend':<20}{'temps (s)':>10}{'tiles/s':>10}{'pic RSS (Mo)':>14}"
+    print(header)
+    print("-" * len(header))
+    ctx = mp.get_context("spawn")
+    # un processus par cas (maxtasksperchild=1) : ru_maxrss ne mesure que ce cas
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for res in pool.imap(_run_isolated, [(c, workers, repeat) for c in cases]):
+            results.append(res)
+            grid = f"{res['rows']}x{res['cols']}"
+            if "error" in res:
+                print(f"{res['node']:<9}{grid:>9}{res['tile']:>7}{res['channels']:>3}  {res['blend']:<20}  ERREUR {res['error']}")
+                continue
+            print(f"{res['node']:<9}{grid:>9}{res['tile']:>7}{res['channels']:>3}  {res['blend']:<20}"
+                  f"{res['seconds']:>10.3f}{res['tiles_per_s']:>10.1f}{res['peak_rss_mb']:>14.1f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark des nodes Mosaic (temps, pic RSS, tuiles/s).")
+    ap.add_argument("--quick", action="store_true", help="petit jeu de cas")
+    ap.add_argument("--only", nargs="*", choices=SECTIONS, help="limiter à certains nodes / aux noyaux")
+    ap.add_argument("--workers", type=int, default=4, help="workers d'export/décodage")
+    ap.add_argument("--repeat", type=int, default=3, help="répétitions (meilleur temps retenu)")
+    ap.add_argument("--json", default="", help="chemin d'un rapport JSON")
+    args = ap.parse_args(argv)
+
+    results = []
+    # nodes d'abord : le pic RSS (ru_maxrss) du parent est hérité par les processus lancés ensuite
+    cases = _case_list(args.quick, args.only)
+    if cases:
+        _bench_nodes(cases, args.workers, args.repeat, results)
+        print()
+    if not args.only or "kernels" in args.only:
+        results += _bench_kernels(args.quick, args.repeat)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "numpy": np.__version__, "results": results}, f, indent=1)
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
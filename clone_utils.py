@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# ComfyUI_DAO_master / clone_utils.py
+# Moteur de tamponnage commun aux nodes Clone : un tableau de positions (x, y) + un ou plusieurs
+# sprites RGBA pré-transformés -> canvas PIL RGBA et union des alphas (numpy H,W uint8).
+# La séquence de clones est découpée en runs consécutifs de rectangles deux à deux disjoints ;
+# chaque run est rendu bande par bande : les sprites sont copiés (numpy) dans un calque
+# transparent, puis un seul alpha_composite PIL fusionne le calque dans le canvas. Les runs très
+# courts (clones qui se recouvrent presque tous) sont composités clone par clone ; si la disposition
+# entière ne peut donner que des runs courts (anneaux, grilles à recouvrement), boucle directe.
+# Résultat identique à un base.alpha_composite(sprite, (x, y)) par clone, dans l'ordre.
+# Grands canvas (workers > 1) : bandes horizontales rendues en parallèle, chacune avec les clones
+# qui la recouvrent (dans l'ordre, clippés) ; PIL relâche le GIL pendant composite et paste.
+# Cache LRU des sprites décodés/transformés des nodes _Path (clé : fichier + mtime + réglages).
+# Empreintes pour IS_CHANGED des nodes _Path (valeurs des widgets, listing du dossier).
+
+import os, hashlib, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable, Iterator, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+
+_BAND_BYTES = 64 << 20     # taille max d'une bande de canvas (octets)
+_SCATTER_PX = 1 << 22      # pixels max copiés par scatter vectorisé
+_SMALL_PX = 64             # sprites <= 64 px : scatter vectorisé plutôt qu'une copie par clone
+_RUN_WINDOW = 256          # fenêtre max du test de recouvrement deux à deux
+_MIN_RUN = 8               # runs plus courts (clones très recouvrants) : composite direct par clone
+_PARALLEL_PX = 1 << 20     # canvas plus petits : rendu séquentiel (le pool de bandes ne paie pas)
+_SPRITE_CACHE_BYTES = 512 << 20  # budget du cache de sprites entre exécutions
+
+_sprite_lock = threading.Lock()
+_sprite_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_sprite_cache_bytes = 0
+
+
+def _cached_sprite(path: str, params: Tuple[Hashable, ...], build: Callable[[str], np.ndarray],
+                   use_cache: bool = True) -> np.ndarray:
+    """Sprite RGBA (uint8 [h,w,4], lecture seule) de `path` transformé par `build(path)`.
+    Clé : chemin absolu, mtime, taille du fichier et `params` (échelle, rotation, opacité...) :
+    un fichier modifié est relu. LRU borné à _SPRITE_CACHE_BYTES ; use_cache=False : pas de cache."""
+    global _sprite_cache_bytes
+    if not use_cache:
+        return build(path)
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size) + tuple(params)
+    with _sprite_lock:
+        arr = _sprite_cache.get(key)
+        if arr is not None:
+            _sprite_cache.move_to_end(key)
+            return arr
+    arr = np.asarray(build(path), np.uint8)
+    arr.flags.writeable = False
+    with _sprite_lock:
+        if key not in _sprite_cache:
+            _sprite_cache[key] = arr
+            _sprite_cache_bytes += arr.nbytes
+        while _sprite_cache_bytes > _SPRITE_CACHE_BYTES and len(_sprite_cache) > 1:
+            _, old = _sprite_cache.popitem(last=False)
+            _sprite_cache_bytes -= old.nbytes
+    return arr
+
+
+def _fingerprint(*parts) -> str:
+    """Empreinte stable (blake2b) de valeurs simples et de listes/dicts : les valeurs de widgets
+    que ComfyUI passe à IS_CHANGED (les entrées liées, tensors compris, n'y arrivent pas)."""
+    h = hashlib.blake2b(digest_size=16)
+
+    def feed(v):
+        if isinstance(v, dict):
+            h.update(b"{")
+            for k in sorted(v, key=str):
+                feed(k)
+                feed(v[k])
+            h.update(b"}")
+        elif isinstance(v, (list, tuple)):
+            h.update(b"[")
+            for x in v:
+                feed(x)
+            h.update(b"]")
+        else:
+            h.update(f"{type(v).__name__}:{v!r};".encode())
+
+    for p in parts:
+        feed(p)
+    return h.hexdigest()
+
+
+def _folder_fingerprint(folder: str, exts) -> list:
+    """(nom, mtime_ns, taille) des images du dossier, triés ; [] si le dossier est absent
+    (le node lèvera l'erreur à l'exécution)."""
+    entries = []
+    try:
+        for e in os.scandir(folder):
+            if e.is_file() and os.path.splitext(e.name)[1].lower() in exts:
+                st = e.stat()
+                entries.append((e.name, st.st_mtime_ns, st.st_size))
+    except OSError:
+        return []
+    return sorted(entries)
+
+
+def _grid_positions(count_x: int, count_y: int, step_x: int, step_y: int, offset_x: int, offset_y: int,
+                    row_offset_x: int = 0, col_offset_y: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Coins haut-gauche d'une grille, ligne par ligne ; décalage des lignes / colonnes impaires."""
+    j, i = np.divmod(np.arange(count_x * count_y, dtype=np.int64), count_x)
+    xs = offset_x + i * step_x + (j % 2) * row_offset_x
+    ys = offset_y + j * step_y + (i % 2) * col_offset_y
+    return xs, ys
+
+
+def _grid_disjoint(sw: int, sh: int, step_x: int, step_y: int, row_offset_x: int = 0, col_offset_y: int = 0) -> bool:
+    """Vrai si deux clones de taille <= (sw, sh) de la grille ne peuvent pas se recouvrir :
+    séparés en X dans une ligne et en Y entre lignes (ou l'inverse)."""
+    by_rows = abs(step_x) >= sw and abs(step_y) - abs(col_offset_y) >= sh
+    by_cols = abs(step_y) >= sh and abs(step_x) - abs(row_offset_x) >= sw
+    return by_rows or by_cols
+
+
+def _ring_angles(count: int, rotate: float) -> np.ndarray:
+    """Angle (degrés) de chaque clone sur l'anneau : répartition uniforme + phase `rotate`."""
+    return (np.arange(count) / count) * 360.0 + rotate
+
+
+def _ring_positions(count: int, radius: float, rotate: float, cx: float, cy: float, sw, sh,
+                    dx=0.0, dy=0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Coins haut-gauche de `count` clones répartis sur un cercle (phase `rotate` en degrés),
+    centrés sur le cercle ; sw/sh : taille commune ou par clone, dx/dy : décalage (jitter)
+    commun ou par clone. Troncature comme int()."""
+    rad = np.radians(_ring_angles(count, rotate))
+    xs = cx + radius * np.cos(rad) - np.asarray(sw) / 2.0 + dx
+    ys = cy + radius * np.sin(rad) - np.asarray(sh) / 2.0 + dy
+    return xs.astype(np.int64), ys.astype(np.int64)
+
+
+def _disjoint_runs(x0, y0, x1, y1) -> Iterator[Tuple[int, int]]:
+    """Runs [s, e) de clones consécutifs deux à deux disjoints. Par fenêtre de _RUN_WINDOW clones :
+    test de recouvrement vectorisé, dernier prédécesseur recouvrant de chaque clone, puis coupe
+    gloutonne (un run s'arrête au premier clone qui recouvre un clone du run)."""
+    n, s = len(x0), 0
+    while s < n:
+        e = min(n, s + _RUN_WINDOW)
+        a = slice(s, e)
+        ov = np.triu((x0[a, None] < x1[None, a]) & (x0[None, a] < x1[a, None]) &
+                     (y0[a, None] < y1[None, a]) & (y0[None, a] < y1[a, None]), 1)
+        last = np.where(ov, np.arange(e - s)[:, None], -1).max(axis=0).tolist()
+        start = 0
+        for k, p in enumerate(last):
+            if p >= start:
+                yield s + start, s + k
+                start = k
+        yield s + start, e
+        s = e
+
+
+def _scatter(layer: np.ndarray, sprites, small, xs, ys, x1, y1, ids, idx, ry0: int, rx0: int, ry1: int, rx1: int) -> None:
+    """Copie les clones `idx` (deux à deux disjoints) dans le calque, clippés à sa zone.
+    Petits sprites entiers : un scatter vectorisé par sprite (pixels RGBA vus en uint32) ;
+    autres : une copie de tranche par clone (memcpy, ~1 µs)."""
+    layer32 = layer.view(np.uint32)[..., 0]
+    inside = (xs[idx] >= rx0) & (x1[idx] <= rx1) & (ys[idx] >= ry0) & (y1[idx] <= ry1)
+    fancy = idx[inside & small[ids[idx]]]
+    for sid in np.unique(ids[fancy]):
+        spr = np.ascontiguousarray(sprites[sid]).view(np.uint32)[..., 0]
+        h, w = spr.shape
+        g = fancy[ids[fancy] == sid]
+        ar_h, ar_w = np.arange(h)[None, :, None], np.arange(w)[None, None, :]
+        step = max(1, _SCATTER_PX // (h * w))
+        for c in range(0, len(g), step):
+            gc = g[c:c + step]
+            layer32[(ys[gc] - ry0)[:, None, None] + ar_h, (xs[gc] - rx0)[:, None, None] + ar_w] = spr
+    rest = np.setdiff1d(idx, fancy, assume_unique=True)
+    for k, x, y, xe, ye in zip(ids[rest].tolist(), xs[rest].tolist(), ys[rest].tolist(),
+                               x1[rest].tolist(), y1[rest].tolist()):
+        ya, yb, xa, xb = max(y, ry0), min(ye, ry1), max(x, rx0), min(xe, rx1)
+        layer[ya - ry0:yb - ry0, xa - rx0:xb - rx0] = sprites[k][ya - y:yb - y, xa - x:xb - x]
+
+
+def _stamp_each(base: Image.Image, mask, sprites, images, xs, ys, x1, y1, ids) -> None:
+    """Composite direct clone par clone (source clippée au canvas), pour les runs courts."""
+    W, H = base.size
+    alphas = [s[..., 3] for s in sprites]
+    for k, x, y, xe, ye in zip(ids.tolist(), xs.tolist(), ys.tolist(), x1.tolist(), y1.tolist()):
+        ya, yb, xa, xb = max(y, 0), min(ye, H), max(x, 0), min(xe, W)
+        if images[k] is None:
+            images[k] = Image.fromarray(np.ascontiguousarray(sprites[k]), "RGBA")
+        if (xa, ya, xb, yb) == (x, y, xe, ye):
+            base.alpha_composite(images[k], (x, y))
+            if mask is not None:
+                m = mask[y:ye, x:xe]
+                np.maximum(m, alphas[k], out=m)
+            continue
+        base.alpha_composite(images[k], (xa, ya), (xa - x, ya - y, xb - x, yb - y))
+        if mask is not None:
+            m = mask[ya:yb, xa:xb]
+            np.maximum(m, alphas[k][ya - y:yb - y, xa - x:xb - x], out=m)
+
+
+def _stamp_run(base: Image.Image, mask, sprites, small, xs, ys, x1, y1, ids, band_h: int) -> None:
+    """Rend un run de clones disjoints, bande par bande : calque transparent (zone utile de la
+    bande) + un alpha_composite en place ; les pixels transparents du calque restent inchangés."""
+    W, H = base.size
+    cy0, cy1 = np.maximum(ys, 0), np.minimum(y1, H)
+    b0, b1 = cy0 // band_h, (cy1 - 1) // band_h
+    for band in range(int(b0.min()), int(b1.max()) + 1):
+        idx = np.nonzero((b0 <= band) & (b1 >= band))[0]
+        if not len(idx):
+            continue
+        rx0, rx1 = max(0, int(xs[idx].min())), min(W, int(x1[idx].max()))
+        ry0 = max(band * band_h, int(cy0[idx].min()))
+        ry1 = min((band + 1) * band_h, H, int(cy1[idx].max()))
+        layer = np.zeros((ry1 - ry0, rx1 - rx0, 4), np.uint8)
+        _scatter(layer, sprites, small, xs, ys, x1, y1, ids, idx, ry0, rx0, ry1, rx1)
+        base.alpha_composite(Image.fromarray(layer, "RGBA"), (rx0, ry0))
+        if mask is not None:
+            m = mask[ry0:ry1, rx0:rx1]
+            np.maximum(m, layer[..., 3], out=m)
+
+
+def _stamp_bands(base: Image.Image, mask, sprites, xs, ys, y1, ids, disjoint: bool, workers: int) -> None:
+    """Rendu parallèle par bandes horizontales disjointes (au moins 2 par thread, au plus
+    _BAND_BYTES chacune) : chaque bande est extraite du canvas, reçoit dans l'ordre les clones
+    qui la recouvrent (décalés, clippés à la bande), puis est recollée à sa place ; le mask est
+    écrit directement dans sa tranche. Les pixels d'une bande ne dépendent que de ses clones :
+    résultat identique au rendu séquentiel."""
+    W, H = base.size
+    n_bands = int(min(H, max(2 * workers, -(-H * W * 4 // _BAND_BYTES))))
+    edges = np.linspace(0, H, n_bands + 1).astype(np.int64).tolist()
+    base.load()  # canvas chargé et modifiable avant les paste concurrents
+
+    def render(k):
+        y0, yb = edges[k], edges[k + 1]
+        idx = np.nonzero((ys < yb) & (y1 > y0))[0]
+        if not len(idx):
+            return
+        band = base.crop((0, y0, W, yb))
+        _stamp_sprites(band, sprites, xs[idx], ys[idx] - y0, ids[idx],
+                       None if mask is None else mask[y0:yb], disjoint)
+        base.paste(band, (0, y0))
+
+    with ThreadPoolExecutor(max_workers=min(workers, n_bands)) as ex:
+        list(ex.map(render, range(n_bands)))
+
+
+def _stamp_sprites(base: Image.Image, sprites: Sequence[np.ndarray], xs, ys, ids=None,
+                   mask: Optional[np.ndarray] = None, disjoint: bool = False, workers: int = 1) -> None:
+    """Tamponne `sprites[ids[k]]` (RGBA uint8 [h,w,4]) au coin (xs[k], ys[k]) du canvas RGBA `base`,
+    dans l'ordre des clones ; `mask` (H,W uint8, optionnel) reçoit l'union (max) des alphas.
+    `disjoint=True` : l'appelant garantit qu'aucun clone n'en recouvre un autre (un seul run).
+    `workers` > 1 : canvas d'au moins _PARALLEL_PX pixels rendu par bandes sur un pool de threads."""
+    W, H = base.size
+    xs = np.asarray(xs, np.int64).ravel()
+    ys = np.asarray(ys, np.int64).ravel()
+    ids = np.zeros(len(xs), np.int64) if ids is None else np.asarray(ids, np.int64).ravel()
+    sizes = np.array([s.shape[:2] for s in sprites], np.int64).reshape(-1, 2)
+    x1, y1 = xs + sizes[ids, 1], ys + sizes[ids, 0]
+    keep = (x1 > xs) & (y1 > ys) & (x1 > 0) & (y1 > 0) & (xs < W) & (ys < H)
+    if not keep.all():
+        xs, ys, x1, y1, ids = xs[keep], ys[keep], x1[keep], y1[keep], ids[keep]
+    if not len(xs):
+        return
+    workers = min(int(workers), os.cpu_count() or 1)
+    if workers > 1 and H > 1 and W * H >= _PARALLEL_PX:
+        _stamp_bands(base, mask, sprites, xs, ys, y1, ids, disjoint, workers)
+        return
+    images = [None] * len(sprites)
+    if not disjoint:
+        # chaque clone qui recouvre son prédécesseur coupe un run : si les runs ne peuvent pas
+        # atteindre _MIN_RUN en moyenne (anneaux, grilles à recouvrement), boucle clone par clone
+        adj = np.count_nonzero((xs[1:] < x1[:-1]) & (xs[:-1] < x1[1:]) & (ys[1:] < y1[:-1]) & (ys[:-1] < y1[1:]))
+        if len(xs) < _MIN_RUN * (adj + 1):
+            _stamp_each(base, mask, sprites, images, xs, ys, x1, y1, ids)
+            return
+    small = sizes[:, 0] * sizes[:, 1] <= _SMALL_PX
+    band_h = max(1, min(H, _BAND_BYTES // (W * 4)))
+    runs = [(0, len(xs))] if disjoint else _disjoint_runs(xs, ys, x1, y1)
+    each = None  # runs courts consécutifs, composités ensemble clone par clone
+    for s, e in list(runs) + [(len(xs), len(xs))]:
+        if s < e and e - s < _MIN_RUN:
+            each = (each[0] if each else s, e)
+            continue
+        if each:
+            a, b = each
+            _stamp_each(base, mask, sprites, images, xs[a:b], ys[a:b], x1[a:b], y1[a:b], ids[a:b])
+            each = None
+        if s < e:
+            _stamp_run(base, mask, sprites, small, xs[s:e], ys[s:e], x1[s:e], y1[s:e], ids[s:e], band_h)
@@ -9,6 +9,8 @@ try:
 except Exception:
     torch = None
 
+from .image_utils import _image_to_pil, _pil_to_image
+
 # ---------- helpers (inchangés) ----------
 def _as_float(x, d):
     try: v = float(x); return v if v==v and v not in (float("inf"), float("-inf")) else d
@@ -24,17 +26,6 @@ def _to_abs_outdir(path: str) -> str:
     if not os.path.isabs(path): path = os.path.abspath(os.path.join(os.getcwd(), path))
     os.makedirs(path, exist_ok=True)
     return path
-def _image_from_comfy(img):
-    if torch is not None and isinstance(img, torch.Tensor): arr = img[0].detach().cpu().numpy()
-    else: arr = np.asarray(img)[0]
-    arr = np.clip(arr, 0.0, 1.0)
-    if arr.shape[-1] == 4: arr = arr[..., :3]
-    rgb = (arr * 255.0 + 0.5).astype(np.uint8)
-    return Image.fromarray(rgb, mode="RGB")
-def _pil_to_comfy_image(img):
-    arr = np.array(img).astype(np.float32) / 255.0
-    if arr.ndim == 2: arr = np.stack([arr, arr, arr], -1)
-    return torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None, ...]
 
 # ---------- binarisation (inchangée) ----------
 def _gray(pil):
@@ -107,7 +98,7 @@ class ConvertIMGtoSVG:
     CATEGORY = "DAO_master/SVG/Convert"
 
     def run(self, image, threshold, auto_otsu, invert, turdsize, alphamax, opttolerance, turnpolicy, fill_rule, backend, save_svg, auto_prefix, out_dir, out_name):
-        pil = _image_from_comfy(image)
+        pil = _image_to_pil(image, mode="RGB")
         g = _gray(pil)
         thr = _otsu(g) if auto_otsu else int(_as_int(threshold, 128))
         mask_obj = _mask_object(g, thr, invert=invert)
@@ -123,7 +114,7 @@ class ConvertIMGtoSVG:
             print("--- ERREUR ConvertIMGtoSVG (Traçage) ---"); traceback.print_exc(); print("-----------------------------------------")
             prev_err = Image.fromarray((mask_obj.astype(np.uint8) * 255), "L").convert("RGB")
             # En cas d'erreur, on renvoie des valeurs vides pour toutes les sorties
-            return ("", "", _pil_to_comfy_image(prev_err))
+            return ("", "", _pil_to_image(prev_err))
 
         svg_path = ""
         if save_svg:
@@ -140,6 +131,6 @@ class ConvertIMGtoSVG:
 
         prev = Image.fromarray((mask_obj.astype(np.uint8) * 255), "L").convert("RGB")
         # --- MODIFICATION DU RETURN ---
-        return (svg_path, svg_text, _pil_to_comfy_image(prev))
+        return (svg_path, svg_text, _pil_to_image(prev))
 
 NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS = {"ConvertIMGtoSVG": ConvertIMGtoSVG}, {"ConvertIMGtoSVG": "Convert IMG → SVG (1-bit)"}
\ No newline at end of file
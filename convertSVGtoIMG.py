@@ -12,15 +12,12 @@ except Exception: torch = None
 from shapely.geometry import Polygon, LinearRing, LineString, MultiLineString, Point, box, MultiPolygon
 from shapely.ops import unary_union
 from shapely import affinity
+from .image_utils import _pil_to_image, _pil_to_mask
 
 def _pil_image_to_comfy_image(img, keep_alpha=False):
-    arr = np.array(img).astype(np.float32)/255.0
-    if arr.ndim == 2: arr = np.stack([arr,arr,arr], -1)
-    if not keep_alpha and arr.shape[-1] == 4: arr = arr[...,:3]
-    return torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None,...]
+    return _pil_to_image(img, mode=None if keep_alpha else "RGB")
 def _pil_mask_to_comfy_mask(mask_img):
-    m = np.array(mask_img.convert("L")).astype(np.float32)/255.0
-    return torch.from_numpy(m).unsqueeze(0) if torch is not None else m[None,...]
+    return _pil_to_mask(mask_img)
 # ... [Toutes les autres fonctions helpers jusqu'à la classe du Node] ...
 def _parse_style_inline(style_str):
     out = {}
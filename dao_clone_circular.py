@@ -6,91 +6,27 @@
 # - radius = distance du centre aux clones.
 # - rotate = rotation globale (phase) de l’anneau, en degrés.
 # - object_rotation = rotation de chaque sprite autour de lui-même.
+# - orientation (fixed / radial / tangent) + jitters rotation/échelle/position (seed) :
+#   transformations quantifiées en un atlas de sprites (rotation_bins x scale_bins) calculé une fois.
 # - use_background (BOOLEAN) + background_hex (#RGB, #RRGGBB, #RRGGBBAA, "white", "black", "transparent").
 # - Entrée mask (optionnelle) pour découper le sprite source.
 # - Sortie mask = union des clones.
 #
 # Sorties:
-#   IMAGE: [1,H,W,4] en 0..1
-#   MASK : [1,H,W]   en 0..1
+#   IMAGE: [B,H,W,4] en 0..1 (un canvas par frame du sprite)
+#   MASK : [B,H,W]   en 0..1
 #
 # Dépendances: Pillow, numpy, torch
 
-import math
 from typing import Optional
 from PIL import Image, ImageChops
 import numpy as np
 import torch
 
-# ---------- Utils robustes ----------
-
-def _image_to_rgba_pil(t: torch.Tensor) -> Image.Image:
-    """
-    Accepte: [B,H,W,C], [H,W,C], [C,H,W]  (C=1/3/4), 0..1
-    Retourne PIL RGBA.
-    """
-    if t is None:
-        raise ValueError("Image tensor is None")
-
-    if t.dim() == 4:  # [B,H,W,C]
-        t = t[0]
-    if t.dim() != 3:
-        raise ValueError("Expected 3D or 4D tensor for image")
-
-    # [C,H,W] -> [H,W,C]
-    if t.shape[0] in (1, 3, 4) and (t.shape[-1] not in (1, 3, 4)):
-        t = t.permute(1, 2, 0)
-
-    if t.shape[-1] not in (1, 3, 4):
-        raise ValueError(f"Unsupported channel count: {t.shape[-1]}")
-
-    arr = t.detach().cpu().float().clamp(0, 1).numpy()  # [H,W,C]
-
-    if arr.shape[-1] == 1:  # gray -> RGBA
-        arr = np.repeat(arr, 3, axis=-1)
-        a = np.ones((*arr.shape[:2], 1), dtype=arr.dtype)
-        arr = np.concatenate([arr, a], axis=-1)
-    elif arr.shape[-1] == 3:  # RGB -> RGBA
-        a = np.ones((*arr.shape[:2], 1), dtype=arr.dtype)
-        arr = np.concatenate([arr, a], axis=-1)
-
-    u8 = (arr * 255.0 + 0.5).astype(np.uint8)
-    return Image.fromarray(u8, mode="RGBA")
-
-
-def _mask_to_L(mask_t: Optional[torch.Tensor], size) -> Optional[Image.Image]:
-    """
-    MASK attendu: [H,W] ou [1,H,W] ou [B,H,W], valeurs 0..1
-    Retourne PIL 'L' 0..255 de la taille demandée (redimensionné si besoin).
-    """
-    if mask_t is None:
-        return None
-
-    t = mask_t
-    if t.dim() == 3:  # [B,H,W] ou [1,H,W]
-        t = t[0]
-    if t.dim() != 2:
-        raise ValueError("Mask must be 2D or 3D [1,H,W]")
-
-    arr = t.detach().cpu().float().clamp(0, 1).numpy()  # [H,W]
-    u8 = (arr * 255.0 + 0.5).astype(np.uint8)
-    m = Image.fromarray(u8, mode="L")
-    if m.size != size:
-        m = m.resize(size, Image.LANCZOS)
-    return m
-
-
-def _rgba_pil_to_tensor(img: Image.Image) -> torch.Tensor:
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
-    arr = np.array(img).astype(np.float32) / 255.0  # [H,W,4]
-    return torch.from_numpy(arr).unsqueeze(0)  # [1,H,W,4]
-
-
-def _maskL_to_tensor(maskL: Image.Image) -> torch.Tensor:
-    arr = np.array(maskL).astype(np.float32) / 255.0  # [H,W]
-    return torch.from_numpy(arr).unsqueeze(0)  # [1,H,W]
+from .image_utils import _image_to_pil, _mask_to_pil, _batch_len, _map_frames
+from .clone_utils import _ring_angles, _ring_positions, _stamp_sprites
 
+# ---------- Utils robustes ----------
 
 def _parse_hex(color: str):
     """
@@ -167,6 +103,46 @@ def _transform_sprite(sprite_rgba: Image.Image, mask_L: Optional[Image.Image],
     return img
 
 
+_ORIENTATIONS = ["fixed", "radial", "tangent"]
+
+
+def _clone_rotations(angles: np.ndarray, orientation: str, object_rotation: float,
+                     jitter: np.ndarray) -> np.ndarray:
+    """
+    Rotation (degrés, sens PIL = anti-horaire à l'écran) de chaque clone.
+    - fixed   : object_rotation pour tous.
+    - radial  : le haut du sprite pointe vers l'extérieur de l'anneau.
+    - tangent : le haut du sprite suit le sens de parcours de l'anneau.
+    """
+    # y vers le bas : un angle croissant tourne dans le sens horaire à l'écran
+    if orientation == "radial":
+        rot = -(angles + 90.0)
+    elif orientation == "tangent":
+        rot = -(angles + 180.0)
+    else:
+        rot = np.zeros_like(angles)
+    return rot + object_rotation + jitter
+
+
+def _build_atlas(sprite_rgba: Image.Image, mask_L: Optional[Image.Image], scales, rotations,
+                 opacity: float, keys: np.ndarray, bins: int) -> list:
+    """
+    Atlas des transformations effectivement utilisées : une entrée par clé unique
+    (scale_idx * bins + rot_idx), même chaîne que _transform_sprite (mask, scale, rotation, opacity).
+    Le mask n'est appliqué qu'une fois, chaque échelle n'est redimensionnée qu'une fois.
+    """
+    masked = _transform_sprite(sprite_rgba, mask_L, scale=1.0, object_rotation=0.0, opacity=1.0)
+    scaled = {}
+    atlas = []
+    for key in keys.tolist():
+        si, ri = divmod(key, bins)
+        if si not in scaled:
+            scaled[si] = _transform_sprite(masked, None, scale=float(scales[si]), object_rotation=0.0, opacity=1.0)
+        img = _transform_sprite(scaled[si], None, scale=1.0, object_rotation=float(rotations[ri]), opacity=opacity)
+        atlas.append(np.asarray(img))
+    return atlas
+
+
 # --------------- NODE: DAO Clone Circular ---------------
 
 class DAOCloneCircular:
@@ -176,6 +152,10 @@ class DAOCloneCircular:
     - `radius` est la distance du centre aux clones.
     - `rotate` décale l'anneau (phase) en degrés.
     - `object_rotation` fait tourner chaque sprite sur lui-même.
+    - `orientation` (radial / tangent) oriente chaque clone selon sa place sur l'anneau ;
+      `rotation_jitter`, `scale_jitter`, `position_jitter` (reproductibles via `seed`)
+      varient chaque clone. Rotations et échelles sont quantifiées (`rotation_bins`,
+      `scale_bins`) : un seul sprite transformé par combinaison utilisée, pas par clone.
     - Entrée optionnelle MASK pour découper le sprite source.
     - Sorties: IMAGE (RGBA) + MASK (union des clones).
     """
@@ -193,11 +173,19 @@ class DAOCloneCircular:
                 "use_background": ("BOOLEAN", {"default": False}),
                 "background_hex": ("STRING", {"default": "#00000000"}),
                 "radius": ("FLOAT", {"default": 300.0, "min": 0.0, "max": 100000.0, "step": 1.0}),
-                "count": ("INT", {"default": 12, "min": 1, "max": 20000}),
+                "count": ("INT", {"default": 12, "min": 1, "max": 1000000}),
                 "rotate": ("FLOAT", {"default": 0.0, "min": -1440.0, "max": 1440.0, "step": 0.1}),
                 "object_rotation": ("FLOAT", {"default": 0.0, "min": -1440.0, "max": 1440.0, "step": 0.1}),
                 "scale": ("FLOAT", {"default": 1.0, "min": 0.01, "max": 10.0, "step": 0.01}),
                 "opacity": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
+                "orientation": (_ORIENTATIONS, {"default": "fixed"}),
+                "rotation_jitter": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 180.0, "step": 0.1}),
+                "scale_jitter": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 0.99, "step": 0.01}),
+                "position_jitter": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 10000.0, "step": 1.0}),
+                "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffff}),
+                "rotation_bins": ("INT", {"default": 360, "min": 1, "max": 3600}),
+                "scale_bins": ("INT", {"default": 16, "min": 1, "max": 256}),
+                "workers": ("INT", {"default": 4, "min": 1, "max": 64}),
             }
         }
 
@@ -206,10 +194,6 @@ class DAOCloneCircular:
     FUNCTION = "run"
     CATEGORY = "DAO_master/Images/Clone"
 
-    @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("NaN")
-
     def run(
         self,
         image: torch.Tensor,
@@ -224,43 +208,67 @@ class DAOCloneCircular:
         object_rotation: float = 0.0,
         scale: float = 1.0,
         opacity: float = 1.0,
+        orientation: str = "fixed",
+        rotation_jitter: float = 0.0,
+        scale_jitter: float = 0.0,
+        position_jitter: float = 0.0,
+        seed: int = 0,
+        rotation_bins: int = 360,
+        scale_bins: int = 16,
+        workers: int = 4,
     ):
-        sprite_rgba = _image_to_rgba_pil(image)
-        mask_L_src = _mask_to_L(mask, sprite_rgba.size)
-
-        base = _make_canvas(canvas_width, canvas_height, use_background, background_hex)
-        mask_canvas = Image.new("L", (canvas_width, canvas_height), 0)
-
-        if count > 50000:
-            raise ValueError("Trop de clones (limite 50k)")
-
-        # centre du canvas
-        cx = canvas_width / 2.0
-        cy = canvas_height / 2.0
-
-        # Pré-transformations invariantes pour tous les clones
-        base_sprite = _transform_sprite(
-            sprite_rgba, mask_L_src, scale=scale, object_rotation=object_rotation, opacity=opacity
-        )
-        sw, sh = base_sprite.size
-
-        # distribution angulaire uniforme 0..360 + phase 'rotate'
-        for i in range(count):
-            ang = (i / count) * 360.0 + rotate
-            rad = math.radians(ang)
-
-            x = cx + radius * math.cos(rad) - sw / 2.0
-            y = cy + radius * math.sin(rad) - sh / 2.0
-
-            # coller RGBA
-            base.alpha_composite(base_sprite, (int(x), int(y)))
-
-            # construire un alpha placé pour le mask de sortie
-            _, _, _, a = base_sprite.split()
-            placed = Image.new("L", (canvas_width, canvas_height), 0)
-            placed.paste(a, (int(x), int(y)), a)
-            mask_canvas = ImageChops.lighter(mask_canvas, placed)  # union (max)
-
-        out_img = _rgba_pil_to_tensor(base)
-        out_mask = _maskL_to_tensor(mask_canvas)
-        return (out_img, out_mask)
+        varied = orientation != "fixed" or rotation_jitter > 0.0 or scale_jitter > 0.0
+        dx = dy = 0.0
+        if varied or position_jitter > 0.0:
+            # tirages par clone, toujours dans le même ordre : un jitter ne rebat pas les autres
+            rng = np.random.default_rng(int(seed))
+            u_rot, u_scale, u_x, u_y = rng.uniform(-1.0, 1.0, (4, count))
+            dx, dy = u_x * position_jitter, u_y * position_jitter
+        if varied:
+            # quantification : rot_idx parmi rotation_bins pas de 360°, scale_idx parmi scale_bins niveaux
+            rbins = max(1, int(rotation_bins))
+            sbins = max(1, int(scale_bins)) if scale_jitter > 0.0 else 1
+            rot = _clone_rotations(_ring_angles(count, rotate), orientation, object_rotation, u_rot * rotation_jitter)
+            rot_idx = np.rint(np.mod(rot, 360.0) * (rbins / 360.0)).astype(np.int64) % rbins
+            rotations = np.arange(rbins) * (360.0 / rbins)
+            scale_idx = np.rint((u_scale + 1.0) * 0.5 * (sbins - 1)).astype(np.int64)
+            scales = scale * (1.0 + scale_jitter * (np.linspace(-1.0, 1.0, sbins) if sbins > 1 else np.zeros(1)))
+            keys, ids = np.unique(scale_idx * rbins + rot_idx, return_inverse=True)
+            ids = ids.reshape(-1)
+
+        # une frame de sprite (et de mask) -> un canvas ; batch complet sur un pool de threads
+        def frame(b):
+            sprite_rgba = _image_to_pil(image, b, mode="RGBA")
+            mask_L_src = _mask_to_pil(mask, b, size=sprite_rgba.size)
+
+            base = _make_canvas(canvas_width, canvas_height, use_background, background_hex)
+            mask_arr = np.zeros((canvas_height, canvas_width), np.uint8)
+
+            # centre du canvas
+            cx = canvas_width / 2.0
+            cy = canvas_height / 2.0
+
+            if varied:
+                # atlas des transformations utilisées, chaque clone centré selon la taille de son entrée
+                atlas = _build_atlas(sprite_rgba, mask_L_src, scales, rotations, opacity, keys, rbins)
+                sprite_ids = ids
+                sw = np.array([a.shape[1] for a in atlas])[sprite_ids]
+                sh = np.array([a.shape[0] for a in atlas])[sprite_ids]
+            else:
+                # Pré-transformations invariantes pour tous les clones
+                base_sprite = _transform_sprite(
+                    sprite_rgba, mask_L_src, scale=scale, object_rotation=object_rotation, opacity=opacity
+                )
+                atlas, sprite_ids = [np.asarray(base_sprite)], None
+                sw, sh = base_sprite.size
+
+            # distribution angulaire uniforme 0..360 + phase 'rotate', tamponnée en une passe
+            xs, ys = _ring_positions(count, radius, rotate, cx, cy, sw, sh, dx, dy)
+            _stamp_sprites(base, atlas, xs, ys, ids=sprite_ids, mask=mask_arr, workers=band_workers)
+
+            return (base, Image.fromarray(mask_arr, "L"))
+
+        # threads partagés entre frames du batch et bandes d'un même canvas
+        n = _batch_len(image, mask)
+        band_workers = max(1, workers // n)
+        return _map_frames(frame, n, ("IMAGE", "MASK"), workers)
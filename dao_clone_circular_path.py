@@ -12,11 +12,13 @@
 #   IMAGE: [1,H,W,4] en 0..1
 #   MASK : [1,H,W]   en 0..1
 
-import os, math, random
+import os, random
 from typing import List, Optional
-from PIL import Image, ImageChops
+from PIL import Image
 import numpy as np
-import torch
+
+from .image_utils import _pil_to_image, _pil_to_mask
+from .clone_utils import _cached_sprite, _fingerprint, _folder_fingerprint, _ring_positions, _stamp_sprites
 
 # ---------- Utils fichiers & images ----------
 
@@ -41,16 +43,6 @@ def _open_rgba(path: str) -> Image.Image:
     img = Image.open(path)
     return img.convert("RGBA")
 
-def _rgba_pil_to_tensor(img: Image.Image) -> torch.Tensor:
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
-    arr = np.array(img).astype(np.float32) / 255.0  # [H,W,4]
-    return torch.from_numpy(arr).unsqueeze(0)  # [1,H,W,4]
-
-def _maskL_to_tensor(maskL: Image.Image) -> torch.Tensor:
-    arr = np.array(maskL).astype(np.float32) / 255.0  # [H,W]
-    return torch.from_numpy(arr).unsqueeze(0)  # [1,H,W]
-
 def _parse_hex(color: str):
     if not color:
         return (0, 0, 0, 0)
@@ -108,13 +100,17 @@ class DAOCloneCircularPath:
                 "use_background": ("BOOLEAN", {"default": False}),
                 "background_hex": ("STRING", {"default": "#00000000"}),
                 "radius": ("FLOAT", {"default": 300.0, "min": 0.0, "max": 100000.0, "step": 1.0}),
-                "count": ("INT", {"default": 12, "min": 1, "max": 20000}),
+                "count": ("INT", {"default": 12, "min": 1, "max": 1000000}),
                 "rotate": ("FLOAT", {"default": 0.0, "min": -1440.0, "max": 1440.0, "step": 0.1}),
                 "object_rotation": ("FLOAT", {"default": 0.0, "min": -1440.0, "max": 1440.0, "step": 0.1}),
                 "scale": ("FLOAT", {"default": 1.0, "min": 0.01, "max": 10.0, "step": 0.01}),
                 "opacity": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
                 "shuffle": ("BOOLEAN", {"default": False}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 2**31-1}),
+            },
+            "optional": {
+                "sprite_cache": ("BOOLEAN", {"default": True}),
+                "workers": ("INT", {"default": 4, "min": 1, "max": 64}),
             }
         }
 
@@ -124,8 +120,10 @@ class DAOCloneCircularPath:
     CATEGORY = "DAO_master/Images/Clone"
 
     @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("NaN")
+    def IS_CHANGED(cls, folder_path: str = "", **kwargs):
+        # valeurs des widgets + listing du dossier (noms, mtimes, tailles) : le cache par défaut
+        # ne voit pas les fichiers modifiés sur disque ; ré-exécution seulement si l'un change
+        return _fingerprint(folder_path, kwargs, _folder_fingerprint(folder_path, _EXTS))
 
     def run(
         self,
@@ -142,6 +140,8 @@ class DAOCloneCircularPath:
         opacity: float = 1.0,
         shuffle: bool = False,
         seed: int = 0,
+        sprite_cache: bool = True,
+        workers: int = 4,
     ):
         files = _list_images_sorted(folder_path)
         if shuffle:
@@ -153,33 +153,22 @@ class DAOCloneCircularPath:
             files = files[:count]
 
         base = _make_canvas(canvas_width, canvas_height, use_background, background_hex)
-        mask_canvas = Image.new("L", (canvas_width, canvas_height), 0)
-
-        if count > 50000:
-            raise ValueError("Trop de clones (limite 50k)")
+        mask_arr = np.zeros((canvas_height, canvas_width), np.uint8)
 
         cx = canvas_width / 2.0
         cy = canvas_height / 2.0
 
-        for i in range(count):
-            path = files[i % len(files)]
-            sprite = _open_rgba(path)
-            sprite = _transform_sprite(sprite, scale=scale, object_rotation=object_rotation, opacity=opacity)
-            sw, sh = sprite.size
-
-            ang = (i / count) * 360.0 + rotate
-            rad = math.radians(ang)
-            x = cx + radius * math.cos(rad) - sw / 2.0
-            y = cy + radius * math.sin(rad) - sh / 2.0
-
-            base.alpha_composite(sprite, (int(x), int(y)))
-
-            # Union du mask
-            _, _, _, a = sprite.split()
-            placed = Image.new("L", (canvas_width, canvas_height), 0)
-            placed.paste(a, (int(x), int(y)), a)
-            mask_canvas = ImageChops.lighter(mask_canvas, placed)
-
-        out_img = _rgba_pil_to_tensor(base)
-        out_mask = _maskL_to_tensor(mask_canvas)
+        # Sprites transformés une fois par fichier (cache LRU entre exécutions) ;
+        # le clone i utilise files[i % N], centré sur l'anneau
+        def load(path):
+            return np.asarray(_transform_sprite(_open_rgba(path), scale=scale, object_rotation=object_rotation,
+                                                opacity=opacity))
+        sprites = [_cached_sprite(p, ("circular", scale, object_rotation, opacity), load, sprite_cache) for p in files]
+        ids = np.arange(count) % len(files)
+        sizes = np.array([sp.shape[:2] for sp in sprites])[ids]
+        xs, ys = _ring_positions(count, radius, rotate, cx, cy, sizes[:, 1], sizes[:, 0])
+        _stamp_sprites(base, sprites, xs, ys, ids, mask=mask_arr, workers=workers)
+
+        out_img = _pil_to_image(base)
+        out_mask = _pil_to_mask(Image.fromarray(mask_arr, "L"))
         return (out_img, out_mask)
@@ -13,80 +13,18 @@
 # - scale, rotation (par objet), opacity
 #
 # Sorties:
-#   IMAGE: [1,H,W,4] en 0..1
-#   MASK : [1,H,W]   en 0..1
+#   IMAGE: [B,H,W,4] en 0..1 (un canvas par frame du sprite)
+#   MASK : [B,H,W]   en 0..1
 
 from typing import Optional, Tuple
 import numpy as np
 from PIL import Image, ImageChops
 import torch
 
-# --------- Utils tensor <-> PIL (robustes) ----------
-
-def _image_to_rgba_pil(t: torch.Tensor) -> Image.Image:
-    """
-    Accepte: [B,H,W,C], [H,W,C], [C,H,W] (C=1/3/4), 0..1 -> PIL RGBA.
-    """
-    if t is None:
-        raise ValueError("Image tensor is None")
-
-    if t.dim() == 4:   # [B,H,W,C]
-        t = t[0]
-    if t.dim() != 3:
-        raise ValueError("Expected 3D or 4D tensor for image")
-
-    # [C,H,W] -> [H,W,C]
-    if t.shape[0] in (1, 3, 4) and (t.shape[-1] not in (1, 3, 4)):
-        t = t.permute(1, 2, 0)
-
-    if t.shape[-1] not in (1, 3, 4):
-        raise ValueError(f"Unsupported channel count: {t.shape[-1]}")
-
-    arr = t.detach().cpu().float().clamp(0, 1).numpy()  # [H,W,C]
-    if arr.shape[-1] == 1:   # Gray -> RGBA
-        arr = np.repeat(arr, 3, axis=-1)
-        a = np.ones((*arr.shape[:2], 1), dtype=arr.dtype)
-        arr = np.concatenate([arr, a], axis=-1)
-    elif arr.shape[-1] == 3: # RGB -> RGBA
-        a = np.ones((*arr.shape[:2], 1), dtype=arr.dtype)
-        arr = np.concatenate([arr, a], axis=-1)
-
-    u8 = (arr * 255.0 + 0.5).astype(np.uint8)
-    return Image.fromarray(u8, mode="RGBA")
-
-
-def _mask_to_L(mask_t: Optional[torch.Tensor], size) -> Optional[Image.Image]:
-    """
-    MASK attendu: [H,W] ou [1,H,W] ou [B,H,W], 0..1 -> PIL 'L' (0..255)
-    """
-    if mask_t is None:
-        return None
-
-    t = mask_t
-    if t.dim() == 3:  # [B,H,W] ou [1,H,W]
-        t = t[0]
-    if t.dim() != 2:
-        raise ValueError("Mask must be 2D or 3D [1,H,W]")
-
-    arr = t.detach().cpu().float().clamp(0, 1).numpy()
-    u8 = (arr * 255.0 + 0.5).astype(np.uint8)
-    m = Image.fromarray(u8, mode="L")
-    if m.size != size:
-        m = m.resize(size, Image.LANCZOS)
-    return m
-
-
-def _rgba_pil_to_tensor(img: Image.Image) -> torch.Tensor:
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
-    arr = np.array(img).astype(np.float32) / 255.0  # [H,W,4]
-    return torch.from_numpy(arr).unsqueeze(0)       # [1,H,W,4]
-
-
-def _maskL_to_tensor(maskL: Image.Image) -> torch.Tensor:
-    arr = np.array(maskL).astype(np.float32) / 255.0  # [H,W]
-    return torch.from_numpy(arr).unsqueeze(0)         # [1,H,W]
+from .image_utils import _image_to_pil, _mask_to_pil, _batch_len, _map_frames
+from .clone_utils import _grid_positions, _grid_disjoint, _stamp_sprites
 
+# --------- Utils couleurs / canvas ----------
 
 def _parse_hex(color: str):
     """
@@ -212,6 +150,7 @@ class DAOCloneGrid:
                 "rotation": ("FLOAT", {"default": 0.0, "min": -1440.0, "max": 1440.0, "step": 0.1}),
                 "scale": ("FLOAT", {"default": 1.0, "min": 0.01, "max": 10.0, "step": 0.01}),
                 "opacity": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
+                "workers": ("INT", {"default": 4, "min": 1, "max": 64}),
             }
         }
 
@@ -220,10 +159,6 @@ class DAOCloneGrid:
     FUNCTION = "run"
     CATEGORY = "DAO_master/Images/Clone"
 
-    @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("NaN")
-
     def run(
         self,
         image: torch.Tensor,
@@ -244,53 +179,42 @@ class DAOCloneGrid:
         rotation: float = 0.0,
         scale: float = 1.0,
         opacity: float = 1.0,
+        workers: int = 4,
     ):
-        sprite_rgba = _image_to_rgba_pil(image)
-        mask_L_src = _mask_to_L(mask, sprite_rgba.size)
-
-        # Sprite transformé (mask/scale/rotation/opacity)
-        sprite_t = _transform_sprite(sprite_rgba, mask_L_src, scale=scale,
-                                     rotation_deg=rotation, opacity=opacity)
-        sw, sh = sprite_t.size
-
-        # Canvas
-        if canvas_mode == "match_input":
-            cw, ch = sprite_rgba.size
-        elif canvas_mode == "auto_from_grid":
-            cw, ch = _auto_canvas_size((sw, sh), count_x, count_y, spacing_x, spacing_y,
-                                       offset_x, offset_y, 1.0)
-        else:  # "custom"
-            cw, ch = canvas_width, canvas_height
-
-        base = _make_canvas(cw, ch, use_background, background_hex)
-        mask_canvas = Image.new("L", (cw, ch), 0)
-
-        total = count_x * count_y
-        if total > 50000:
-            raise ValueError("Trop de clones (limite 50k)")
-
-        step_x = sw + spacing_x
-        step_y = sh + spacing_y
-
-        for j in range(count_y):
-            for i in range(count_x):
-                x = offset_x + i * step_x
-                y = offset_y + j * step_y
-
-                # Décalages alternés
-                if row_offset_x != 0 and (j % 2 == 1):
-                    x += row_offset_x
-                if col_offset_y != 0 and (i % 2 == 1):
-                    y += col_offset_y
-
-                base.alpha_composite(sprite_t, (int(x), int(y)))
-
-                # union du mask
-                _, _, _, a = sprite_t.split()
-                placed = Image.new("L", (cw, ch), 0)
-                placed.paste(a, (int(x), int(y)), a)
-                mask_canvas = ImageChops.lighter(mask_canvas, placed)
-
-        out_img = _rgba_pil_to_tensor(base)
-        out_mask = _maskL_to_tensor(mask_canvas)
-        return (out_img, out_mask)
+        # une frame de sprite (et de mask) -> un canvas ; batch complet sur un pool de threads
+        def frame(b):
+            sprite_rgba = _image_to_pil(image, b, mode="RGBA")
+            mask_L_src = _mask_to_pil(mask, b, size=sprite_rgba.size)
+
+            # Sprite transformé (mask/scale/rotation/opacity)
+            sprite_t = _transform_sprite(sprite_rgba, mask_L_src, scale=scale,
+                                         rotation_deg=rotation, opacity=opacity)
+            sw, sh = sprite_t.size
+
+            # Canvas
+            if canvas_mode == "match_input":
+                cw, ch = sprite_rgba.size
+            elif canvas_mode == "auto_from_grid":
+                cw, ch = _auto_canvas_size((sw, sh), count_x, count_y, spacing_x, spacing_y,
+                                           offset_x, offset_y, 1.0)
+            else:  # "custom"
+                cw, ch = canvas_width, canvas_height
+
+            base = _make_canvas(cw, ch, use_background, background_hex)
+            mask_arr = np.zeros((ch, cw), np.uint8)
+
+            # positions de tous les clones (décalages alternés inclus), tamponnées en une passe
+            step_x = sw + spacing_x
+            step_y = sh + spacing_y
+            xs, ys = _grid_positions(count_x, count_y, step_x, step_y, offset_x, offset_y,
+                                     row_offset_x, col_offset_y)
+            _stamp_sprites(base, [np.asarray(sprite_t)], xs, ys, mask=mask_arr,
+                           disjoint=_grid_disjoint(sw, sh, step_x, step_y, row_offset_x, col_offset_y),
+                           workers=band_workers)
+
+            return (base, Image.fromarray(mask_arr, "L"))
+
+        # threads partagés entre frames du batch et bandes d'un même canvas
+        n = _batch_len(image, mask)
+        band_workers = max(1, workers // n)
+        return _map_frames(frame, n, ("IMAGE", "MASK"), workers)
@@ -15,9 +15,11 @@
 
 import os, random
 from typing import List
-from PIL import Image, ImageChops
+from PIL import Image
 import numpy as np
-import torch
+
+from .image_utils import _pil_to_image, _pil_to_mask
+from .clone_utils import _cached_sprite, _fingerprint, _folder_fingerprint, _grid_positions, _grid_disjoint, _stamp_sprites
 
 _EXTS = {".png", ".jpg", ".jpeg"}
 
@@ -40,16 +42,6 @@ def _open_rgba(path: str) -> Image.Image:
     img = Image.open(path)
     return img.convert("RGBA")
 
-def _rgba_pil_to_tensor(img: Image.Image) -> torch.Tensor:
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
-    arr = np.array(img).astype(np.float32) / 255.0
-    return torch.from_numpy(arr).unsqueeze(0)
-
-def _maskL_to_tensor(maskL: Image.Image) -> torch.Tensor:
-    arr = np.array(maskL).astype(np.float32) / 255.0
-    return torch.from_numpy(arr).unsqueeze(0)
-
 def _parse_hex(color: str):
     if not color:
         return (0, 0, 0, 0)
@@ -122,6 +114,10 @@ class DAOCloneGridPath:
                 # Random
                 "shuffle": ("BOOLEAN", {"default": False}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 2**31-1}),
+            },
+            "optional": {
+                "sprite_cache": ("BOOLEAN", {"default": True}),
+                "workers": ("INT", {"default": 4, "min": 1, "max": 64}),
             }
         }
 
@@ -131,8 +127,10 @@ class DAOCloneGridPath:
     CATEGORY = "DAO_master/Images/Clone"
 
     @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("NaN")
+    def IS_CHANGED(cls, folder_path: str = "", **kwargs):
+        # valeurs des widgets + listing du dossier (noms, mtimes, tailles) : le cache par défaut
+        # ne voit pas les fichiers modifiés sur disque ; ré-exécution seulement si l'un change
+        return _fingerprint(folder_path, kwargs, _folder_fingerprint(folder_path, _EXTS))
 
     def run(
         self,
@@ -155,6 +153,8 @@ class DAOCloneGridPath:
         opacity: float = 1.0,
         shuffle: bool = False,
         seed: int = 0,
+        sprite_cache: bool = True,
+        workers: int = 4,
     ):
         files = _list_images_sorted(folder_path)
         total_needed = count_x * count_y
@@ -164,10 +164,12 @@ class DAOCloneGridPath:
         if len(files) > total_needed:
             files = files[:total_needed]
 
+        # Sprites transformés une fois par fichier (cache LRU entre exécutions) ; le clone k utilise files[k % N]
+        def load(path):
+            return np.asarray(_transform_sprite(_open_rgba(path), scale=scale, rotation_deg=rotation, opacity=opacity))
+        sprites = [_cached_sprite(p, ("grid", scale, rotation, opacity), load, sprite_cache) for p in files]
         # Sprite de référence (pour step), basé sur la première image du set
-        ref_sprite = _open_rgba(files[0])
-        ref_sprite = _transform_sprite(ref_sprite, scale=scale, rotation_deg=rotation, opacity=opacity)
-        sw, sh = ref_sprite.size
+        sh, sw = sprites[0].shape[:2]
 
         # Canvas
         if canvas_mode == "auto_from_grid":
@@ -177,41 +179,21 @@ class DAOCloneGridPath:
             cw, ch = canvas_width, canvas_height
 
         base = _make_canvas(cw, ch, use_background, background_hex)
-        mask_canvas = Image.new("L", (cw, ch), 0)
+        mask_arr = np.zeros((ch, cw), np.uint8)
 
         step_x = sw + spacing_x
         step_y = sh + spacing_y
 
-        idx = 0
-        N = len(files)
-
-        for j in range(count_y):
-            for i in range(count_x):
-                path = files[idx % N]
-                idx += 1
-
-                sprite = _open_rgba(path)
-                sprite = _transform_sprite(sprite, scale=scale, rotation_deg=rotation, opacity=opacity)
-                ssw, ssh = sprite.size
-
-                x = offset_x + i * step_x
-                y = offset_y + j * step_y
-                if row_offset_x != 0 and (j % 2 == 1):
-                    x += row_offset_x
-                if col_offset_y != 0 and (i % 2 == 1):
-                    y += col_offset_y
-
-                # centrer sur la "cell" (optionnel) : ici on cale en haut-gauche pour rester strict
-                # Si on voulait centrer : x += (sw - ssw)//2 ; y += (sh - ssh)//2
-
-                base.alpha_composite(sprite, (int(x), int(y)))
-
-                # union mask
-                _, _, _, a = sprite.split()
-                placed = Image.new("L", (cw, ch), 0)
-                placed.paste(a, (int(x), int(y)), a)
-                mask_canvas = ImageChops.lighter(mask_canvas, placed)
-
-        out_img = _rgba_pil_to_tensor(base)
-        out_mask = _maskL_to_tensor(mask_canvas)
+        # calage en haut-gauche de chaque cellule (pas de centrage, pour rester strict)
+        xs, ys = _grid_positions(count_x, count_y, step_x, step_y, offset_x, offset_y,
+                                 row_offset_x, col_offset_y)
+        ids = np.arange(total_needed) % len(files)
+        max_h = max(sp.shape[0] for sp in sprites)
+        max_w = max(sp.shape[1] for sp in sprites)
+        _stamp_sprites(base, sprites, xs, ys, ids, mask=mask_arr,
+                       disjoint=_grid_disjoint(max_w, max_h, step_x, step_y, row_offset_x, col_offset_y),
+                       workers=workers)
+
+        out_img = _pil_to_image(base)
+        out_mask = _pil_to_mask(Image.fromarray(mask_arr, "L"))
         return (out_img, out_mask)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# ComfyUI_DAO_master / dao_lazy.py
+# Classes de node paresseuses : le module réel (ezdxf, shapely, cairosvg, ...) n'est importé qu'au
+# premier accès à un attribut de la classe (INPUT_TYPES, RETURN_TYPES, ...) ou à son instanciation.
+
+import importlib, threading
+from typing import Callable, List
+
+_lock = threading.RLock()
+_load_hooks: List[Callable[[str, type], None]] = []
+
+
+def add_load_hook(fn: Callable[[str, type], None]) -> None:
+    """`fn(key, classe_réelle)` est appelé une fois par node, au chargement de son module."""
+    _load_hooks.append(fn)
+
+
+class _LazyNodeMeta(type):
+    def _resolve(cls) -> type:
+        real = cls._lazy_real
+        if real is None:
+            with _lock:
+                real = cls._lazy_real
+                if real is None:
+                    module = importlib.import_module(f".{cls._lazy_module}", cls._lazy_package)
+                    real = getattr(module, cls._lazy_class)
+                    for hook in _load_hooks:
+                        hook(cls._lazy_key, real)
+                    cls._lazy_real = real
+        return real
+
+    def __getattr__(cls, name):
+        # appelé seulement si l'attribut n'existe pas sur le proxy : on le lit sur la vraie classe
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return getattr(cls._resolve(), name)
+
+    def __call__(cls, *args, **kwargs):
+        return cls._resolve()(*args, **kwargs)
+
+
+def lazy_node(package: str, module: str, class_name: str, key: str = "") -> type:
+    """Proxy de `package.module.class_name` à placer dans NODE_CLASS_MAPPINGS."""
+    return _LazyNodeMeta(class_name, (), {
+        "__module__": f"{package}.{module}",
+        "_lazy_package": package, "_lazy_module": module, "_lazy_class": class_name,
+        "_lazy_key": key or class_name, "_lazy_real": None,
+    })
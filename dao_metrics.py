@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# ComfyUI_DAO_master / dao_metrics.py
+# Instrumentation optionnelle des nodes (temps réel, temps CPU, pic tracemalloc, tailles des tensors).
+# Activée par la variable d'environnement DAO_METRICS=1 ; agrégats sur GET /dao/metrics,
+# profil JSON par prompt dans DAO_METRICS_DIR (défaut : output/dao_metrics).
+
+import os, json, time, threading, tracemalloc, functools, inspect
+from typing import Any, Dict, List
+
+ENV_FLAG = "DAO_METRICS"
+ENV_DIR = "DAO_METRICS_DIR"
+_MAX_PROMPTS = 32  # profils gardés en mémoire pour la route HTTP
+
+_lock = threading.Lock()
+_totals: Dict[str, Dict[str, float]] = {}
+_prompts: Dict[str, List[Dict[str, Any]]] = {}
+
+
+def metrics_enabled() -> bool:
+    return os.environ.get(ENV_FLAG, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _profile_dir() -> str:
+    return os.environ.get(ENV_DIR, "").strip() or os.path.join("output", "dao_metrics")
+
+
+def _tensor_sizes(obj, out: List[Dict[str, Any]], depth: int = 0) -> List[Dict[str, Any]]:
+    """Forme et taille (octets) des tensors/ndarrays trouvés dans args/kwargs/sorties."""
+    if depth > 3:
+        return out
+    shape = getattr(obj, "shape", None)
+    if shape is not None and hasattr(obj, "dtype"):
+        nbytes = getattr(obj, "nbytes", None)
+        if nbytes is None and hasattr(obj, "element_size"):
+            nbytes = obj.element_size() * obj.numel()
+        out.append({"shape": list(shape), "dtype": str(obj.dtype), "bytes": int(nbytes or 0)})
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            _tensor_sizes(v, out, depth + 1)
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            _tensor_sizes(v, out, depth + 1)
+    return out
+
+
+def _current_prompt_id() -> str:
+    try:
+        from server import PromptServer
+        pid = getattr(PromptServer.instance, "last_prompt_id", None)
+    except Exception:
+        pid = None
+    return str(pid) if pid else "no_prompt"
+
+
+def _record(node: str, rec: Dict[str, Any]) -> None:
+    pid = _current_prompt_id()
+    rec = dict(rec, node=node, prompt_id=pid, time=time.time())
+    with _lock:
+        t = _totals.setdefault(node, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "wall_max_s": 0.0,
+                                      "peak_mem_max_mb": 0.0, "errors": 0})
+        t["calls"] += 1
+        t["wall_s"] += rec["wall_s"]
+        t["cpu_s"] += rec["cpu_s"]
+        t["wall_max_s"] = max(t["wall_max_s"], rec["wall_s"])
+        t["peak_mem_max_mb"] = max(t["peak_mem_max_mb"], rec["peak_mem_mb"])
+        t["errors"] += 0 if rec["ok"] else 1
+        records = _prompts.setdefault(pid, [])
+        records.append(rec)
+        while len(_prompts) > _MAX_PROMPTS:
+            _prompts.pop(next(iter(_prompts)))
+        snapshot = list(records)
+    _dump_prompt(pid, snapshot)
+
+
+def _dump_prompt(pid: str, records: List[Dict[str, Any]]) -> None:
+    """Réécrit le profil du prompt (quelques dizaines de nodes : coût négligeable)."""
+    try:
+        d = _profile_dir()
+        os.makedirs(d, exist_ok=True)
+        safe = "".join(ch for ch in pid if ch.isalnum() or ch in "-_") or "prompt"
+        with open(os.path.join(d, f"{safe}.json"), "w", encoding="utf-8") as f:
+            json.dump({"prompt_id": pid, "total_wall_s": round(sum(r["wall_s"] for r in records), 6),
+                       "nodes": records}, f, indent=1)
+    except OSError as e:
+        print(f"[DAO Metrics] Écriture du profil impossible : {e}")
+
+
+def _wrap(node: str, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        mem0 = tracemalloc.get_traced_memory()[0]
+        w0, c0 = time.perf_counter(), time.process_time()
+        ok, result = False, None
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            wall, cpu = time.perf_counter() - w0, time.process_time() - c0
+            peak = max(0, tracemalloc.get_traced_memory()[1] - mem0)
+            if started:
+                tracemalloc.stop()
+            try:
+                _record(node, {
+                    "wall_s": round(wall, 6), "cpu_s": round(cpu, 6), "peak_mem_mb": round(peak / 2**20, 3), "ok": ok,
+                    "inputs": _tensor_sizes(list(args[1:]) + list(kwargs.values()), []),
+                    "outputs": _tensor_sizes(result, []) if ok else [],
+                })
+            except Exception as e:
+                print(f"[DAO Metrics] {node} : {e}")
+    wrapper._dao_metrics = True
+    return wrapper
+
+
+def instrument_nodes(mappings: Dict[str, type]) -> int:
+    """Enveloppe la méthode FUNCTION de chaque classe de node ; retourne le nombre de nodes instrumentés."""
+    n = 0
+    for name, cls in mappings.items():
+        fname = inspect.getattr_static(cls, "FUNCTION", None)  # statique : ne charge pas un node paresseux
+        fn = inspect.getattr_static(cls, fname, None) if fname else None
+        if not inspect.isfunction(fn) or getattr(fn, "_dao_metrics", False):
+            continue
+        setattr(cls, fname, _wrap(name, fn))
+        n += 1
+    return n
+
+
+def metrics_snapshot(prompt_id: str = "") -> Dict[str, Any]:
+    with _lock:
+        nodes = {k: dict(v, wall_mean_s=v["wall_s"] / max(v["calls"], 1)) for k, v in _totals.items()}
+        prompts = {k: list(v) for k, v in _prompts.items() if not prompt_id or k == prompt_id}
+    return {"enabled": metrics_enabled(), "profile_dir": _profile_dir(), "nodes": nodes,
+            "prompts": prompts if prompt_id else {k: len(v) for k, v in prompts.items()}}
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _totals.clear()
+        _prompts.clear()
+
+
+# ---------- HTTP (/dao/metrics) ----------
+
+def _register_routes_once():
+    from aiohttp import web
+    from server import PromptServer
+    ps = PromptServer.instance
+    if getattr(ps, "_dao_metrics_routes", False):
+        return
+    async def get_metrics(request):
+        # ?prompt=<id> : détail d'un prompt ; ?reset=1 : remise à zéro après lecture
+        data = metrics_snapshot(request.query.get("prompt", ""))
+        if request.query.get("reset", "") in ("1", "true"):
+            reset_metrics()
+        return web.json_response(data)
+    ps.routes.get("/dao/metrics")(get_metrics)
+    ps._dao_metrics_routes = True
+
+
+def register_routes() -> None:
+    try:
+        _register_routes_once()
+    except Exception as e:
+        print(f"[DAO Metrics] Route registration error: {e}")
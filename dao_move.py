@@ -10,70 +10,19 @@
 #     * apply_mask_to_alpha : insère MASK comme canal alpha (préserve la transparence PNG)
 #     * invert_mask : inverse le MASK entrant (utile si masque inversé)
 
+import math
 import numpy as np
 from PIL import Image, ImageOps
 
+from .mosaic_nodes import _run_tiled
+from .image_utils import _image_to_pil, _mask_to_pil, _alpha_to_pil, _batch_len, _map_frames
+
 try:
     import torch
 except Exception:
     torch = None
 
 
-# =========================
-#      IMAGE / MASK I/O
-# =========================
-
-def _tensor_to_pil(img):
-    if img is None:
-        return None
-    # ComfyUI IMAGE = float32 [B,H,W,C] in 0..1
-    if (torch is not None) and isinstance(img, torch.Tensor):
-        arr = img[0].detach().cpu().numpy()
-    else:
-        arr = img[0]
-    arr = (np.clip(arr, 0.0, 1.0) * 255.0).astype(np.uint8)
-    if arr.ndim == 3 and arr.shape[-1] == 4:
-        return Image.fromarray(arr, "RGBA")
-    if arr.ndim == 3 and arr.shape[-1] >= 3:
-        return Image.fromarray(arr[..., :3], "RGB")
-    # grayscale fallback
-    return Image.fromarray(arr.squeeze().astype(np.uint8), "L").convert("RGBA")
-
-
-def _pil_to_tensor(img: Image.Image):
-    arr = np.asarray(img).astype(np.float32) / 255.0
-    if arr.ndim == 2:
-        arr = np.stack([arr, arr, arr], axis=-1)
-    return torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None, ...]
-
-
-def _mask_from_rgba(img: Image.Image):
-    """Extrait alpha en MASK [B,H,W] (0..1). Si pas d'alpha -> tout opaque."""
-    if img.mode != "RGBA":
-        h, w = img.size[1], img.size[0]
-        m = np.ones((h, w), np.float32)
-        return torch.from_numpy(m).unsqueeze(0) if torch is not None else m[None, ...]
-    a = np.asarray(img.split()[-1], np.float32) / 255.0
-    return torch.from_numpy(a).unsqueeze(0) if torch is not None else a[None, ...]
-
-
-def _mask_tensor_to_pil(mask):
-    if mask is None:
-        return None
-    if (torch is not None) and isinstance(mask, torch.Tensor):
-        arr = mask[0].detach().cpu().numpy()
-    else:
-        arr = mask[0]
-    arr = (np.clip(arr, 0.0, 1.0) * 255.0).astype(np.uint8)
-    return Image.fromarray(arr, "L")
-
-
-def _pil_to_mask_tensor(img: Image.Image):
-    g = img.convert("L")
-    arr = np.asarray(g, dtype=np.float32) / 255.0
-    return torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None, ...]
-
-
 # =========================
 #      AFFINE HELPERS
 # =========================
@@ -109,6 +58,36 @@ def _inv_affine_uniform(scale: float, angle_deg: float, dx: float, dy: float, cx
     return (a, b, c0, d, e, f0)
 
 
+def _snap_coeffs(coeffs, w: int, h: int):
+    """Arrondit les coefficients affines sur une grille dyadique 2^k choisie pour que toute somme
+    a*x + b*y + c sur l'image (et le pas incrémental de PIL) soit exacte en float64 : la
+    coordonnée source d'un pixel ne dépend plus de l'origine de la tuile qui le rend."""
+    a, b, c0, d, e, f0 = (float(v) for v in coeffs)
+    ext = max(w, h) + 1
+    bound = max(abs(c0) + (abs(a) + abs(b)) * ext, abs(f0) + (abs(d) + abs(e)) * ext, 1.0)
+    q = 2.0 ** (math.frexp(bound)[1] + 2 - 52)
+    return tuple(round(v / q) * q for v in (a, b, c0, d, e, f0))
+
+
+def _transform_tiled(img: Image.Image, coeffs, resample, fillcolor, tile_size: int = 0) -> Image.Image:
+    """Image.transform AFFINE ; avec tile_size > 0, la sortie est rendue tuile par tuile
+    (coefficients translatés de l'origine de chaque tuile) : même résultat, buffers bornés."""
+    w, h = img.size
+    if tile_size <= 0 or max(w, h) <= tile_size:
+        return img.transform((w, h), Image.AFFINE, coeffs, resample=resample, fillcolor=fillcolor)
+    a, b, c0, d, e, f0 = coeffs
+
+    def render_tile(t, y0, x0):
+        th, tw = t.shape[0], t.shape[1]
+        ct = (a, b, c0 + a * x0 + b * y0, d, e, f0 + d * x0 + e * y0)
+        return np.asarray(img.transform((tw, th), Image.AFFINE, ct, resample=resample, fillcolor=fillcolor))
+
+    # la grille de sortie a la taille de l'entrée ; seules les coordonnées des tuiles servent
+    grid = np.broadcast_to(np.zeros((1, 1, 1), np.uint8), (h, w, 1))
+    out = _run_tiled(grid, render_tile, tile_size, tile_size, overlap=0, blend="center")
+    return Image.fromarray(out, img.mode)
+
+
 # =========================
 #         NODE
 # =========================
@@ -140,55 +119,60 @@ class DAOMove:
             },
             "optional": {
                 "mask": ("MASK", {}),
+                "tile_size": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 64}),
+                "workers": ("INT", {"default": 4, "min": 1, "max": 64}),
             },
         }
 
     def apply(self, image, angle_deg, scale, dx, dy,
               pivot_mode, pivot_x, pivot_y,
               flip_h, flip_v, apply_mask_to_alpha, invert_mask,
-              mask=None):
-
-        # ---- 1) Entrées -> PIL ----
-        pil_img = _tensor_to_pil(image)            # RGB/RGBA
-        pil_msk = _mask_tensor_to_pil(mask) if mask is not None else None
-
-        # Si pas de mask, on prend l'alpha s'il existe, sinon tout opaque
-        if pil_msk is None:
-            pil_msk = _mask_tensor_to_pil(_mask_from_rgba(pil_img))
-
-        # Inversion éventuelle du mask
-        if invert_mask and pil_msk is not None:
-            pil_msk = ImageOps.invert(pil_msk.convert("L"))
-
-        # Appliquer le mask comme alpha sur l'image pour préserver la transparence
-        base = pil_img.convert("RGBA")
-        if apply_mask_to_alpha and pil_msk is not None:
-            a = pil_msk.convert("L")
-            r, g, b, _ = base.split()
-            base = Image.merge("RGBA", (r, g, b, a))
-
-        # ---- 2) Affine ----
-        w, h = base.size
-        if pivot_mode == "center":
-            cx, cy = w / 2.0, h / 2.0
-        elif pivot_mode == "top_left":
-            cx, cy = 0.0, 0.0
-        else:  # custom
-            cx, cy = float(pivot_x), float(pivot_y)
-
-        coeffs = _inv_affine_uniform(scale, angle_deg, dx, dy, cx, cy)
-        out_img = base.transform((w, h), Image.AFFINE, coeffs,
-                                 resample=Image.BICUBIC, fillcolor=(0, 0, 0, 0))
-        out_msk = pil_msk.transform((w, h), Image.AFFINE, coeffs,
-                                    resample=Image.NEAREST, fillcolor=0)
-
-        # ---- 3) Flips ----
-        if flip_h:
-            out_img = ImageOps.mirror(out_img)
-            out_msk = ImageOps.mirror(out_msk)
-        if flip_v:
-            out_img = ImageOps.flip(out_img)
-            out_msk = ImageOps.flip(out_msk)
-
-        # ---- 4) Sorties ----
-        return (_pil_to_tensor(out_img), _pil_to_mask_tensor(out_msk))
+              mask=None, tile_size=0, workers=4):
+
+        def frame(i):
+            # ---- 1) Entrées -> PIL ----
+            pil_img = _image_to_pil(image, i)          # RGB/RGBA
+            pil_msk = _mask_to_pil(mask, i) if mask is not None else None
+
+            # Si pas de mask, on prend l'alpha s'il existe, sinon tout opaque
+            if pil_msk is None:
+                pil_msk = _alpha_to_pil(pil_img)
+
+            # Inversion éventuelle du mask
+            if invert_mask and pil_msk is not None:
+                pil_msk = ImageOps.invert(pil_msk.convert("L"))
+
+            # Appliquer le mask comme alpha sur l'image pour préserver la transparence
+            base = pil_img.convert("RGBA")
+            if apply_mask_to_alpha and pil_msk is not None:
+                a = pil_msk.convert("L")
+                r, g, b, _ = base.split()
+                base = Image.merge("RGBA", (r, g, b, a))
+
+            # ---- 2) Affine ----
+            w, h = base.size
+            if pivot_mode == "center":
+                cx, cy = w / 2.0, h / 2.0
+            elif pivot_mode == "top_left":
+                cx, cy = 0.0, 0.0
+            else:  # custom
+                cx, cy = float(pivot_x), float(pivot_y)
+
+            coeffs = _snap_coeffs(_inv_affine_uniform(scale, angle_deg, dx, dy, cx, cy), w, h)
+            out_img = _transform_tiled(base, coeffs, Image.BICUBIC, (0, 0, 0, 0), tile_size)
+            # mask 'L' (1 octet/px) transformé d'un bloc : NEAREST en virgule fixe dépend de l'origine
+            out_msk = pil_msk.transform((w, h), Image.AFFINE, coeffs,
+                                        resample=Image.NEAREST, fillcolor=0)
+
+            # ---- 3) Flips ----
+            if flip_h:
+                out_img = ImageOps.mirror(out_img)
+                out_msk = ImageOps.mirror(out_msk)
+            if flip_v:
+                out_img = ImageOps.flip(out_img)
+                out_msk = ImageOps.flip(out_msk)
+
+            return (out_img, out_msk)
+
+        # ---- 4) Sorties : batch complet (frames sur un pool de threads, tensors préalloués) ----
+        return _map_frames(frame, _batch_len(image, mask), ("IMAGE", "MASK"), workers)
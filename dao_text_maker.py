@@ -13,13 +13,23 @@ except Exception:
 
 from PIL import Image, ImageDraw, ImageFont
 
-# Vectorisation propre (polygones) pour Illustrator
-try:
-    from matplotlib.textpath import TextPath
-    from matplotlib.font_manager import FontProperties
-    _HAS_MPL = True
-except Exception:
-    _HAS_MPL = False
+from .image_utils import _pil_to_image, _pil_to_mask
+
+# Vectorisation propre (polygones) pour Illustrator ; matplotlib importé au premier rendu SVG
+# (ce module est chargé au démarrage pour sa route HTTP)
+_MPL = None
+
+def _matplotlib():
+    """(TextPath, FontProperties) ou None si matplotlib est absent."""
+    global _MPL
+    if _MPL is None:
+        try:
+            from matplotlib.textpath import TextPath
+            from matplotlib.font_manager import FontProperties
+            _MPL = (TextPath, FontProperties)
+        except Exception:
+            _MPL = False
+    return _MPL or None
 
 
 # ---------- helpers ----------
@@ -60,15 +70,10 @@ def _alpha_pct_to_01(a):
     return max(0.0, min(1.0, v / 100.0))
 
 def _to_tensor_rgb(img: Image.Image):
-    arr = np.asarray(img, dtype=np.float32) / 255.0
-    if arr.ndim == 2:
-        arr = np.stack([arr, arr, arr], axis=-1)
-    arr = arr[..., :3]
-    return torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None, ...]
+    return _pil_to_image(img, mode="RGB")
 
 def _to_tensor_mask(mask: Image.Image):
-    arr = np.asarray(mask, dtype=np.float32) / 255.0
-    return torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None, ...]
+    return _pil_to_mask(mask)
 
 def _load_font(font_path: str, size: int):
     try:
@@ -121,7 +126,8 @@ def _make_svg_paths(lines, width, height, font_path, font_size,
     Vectorisation robuste : 1 seul <path> par ligne, trous OK (evenodd),
     et alignements 'left' / 'center' / 'right' identiques à PIL.
     """
-    if not _HAS_MPL:
+    mpl = _matplotlib()
+    if mpl is None:
         ff = os.path.basename(font_path) if font_path else "sans-serif"
         return _make_svg_text(lines, width, height, ff, font_size,
                               fill_hex, fill_alpha, stroke_hex, stroke_width, stroke_alpha, align)
@@ -132,6 +138,8 @@ def _make_svg_paths(lines, width, height, font_path, font_size,
     fill_op = _alpha_pct_to_01(fill_alpha)
     stroke_op = _alpha_pct_to_01(stroke_alpha)
 
+    TextPath, FontProperties = mpl
+
     # --- font pour TextPath (vecteur) ---
     fp = FontProperties(fname=font_path if font_path else None, size=font_size)
 
@@ -332,8 +340,7 @@ class DAOTextMaker:
 
         # IMAGE de sortie
         if bg_transparent and image_rgba:
-            arr = (np.asarray(rgba, dtype=np.float32) / 255.0)  # HxWx4
-            image_out = torch.from_numpy(arr).unsqueeze(0) if torch is not None else arr[None, ...]
+            image_out = _pil_to_image(rgba)  # 1xHxWx4
         else:
             image_out = _to_tensor_rgb(rgba.convert("RGB"))
 
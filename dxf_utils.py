@@ -1,10 +1,10 @@
 # ComfyUI_DXF/dxf_utils.py
-import time, ezdxf, torch
-import numpy as np
+import time, ezdxf
 from dataclasses import dataclass
 from typing import Tuple, List, Optional, Any
 from PIL import Image, ImageDraw, ImageChops
 import ezdxf.path  # pour make_path(...)
+from .image_utils import _pil_to_image, _pil_to_mask
 
 @dataclass
 class DXFDoc:
@@ -214,13 +214,11 @@ def _render_internal_rgb_and_mask(
         return rgb_image, mask
 
 def _to_image_tensor(img):
-    img_conv = img.convert("RGBA") if img.mode == 'RGBA' else img.convert("RGB")
-    arr = np.array(img_conv).astype(np.float32) / 255.0
-    return torch.from_numpy(arr).unsqueeze(0)
+    # seul un RGBA garde son alpha (LA, P... -> RGB), comme avant
+    return _pil_to_image(img, mode="RGBA" if img.mode == "RGBA" else "RGB")
 
 def _to_mask_tensor(mask):
-    arr = np.array(mask.convert("L")).astype(np.float32) / 255.0
-    return torch.from_numpy(arr).unsqueeze(0)
+    return _pil_to_mask(mask)
 
 class _BaseAdd:
     @classmethod
@@ -29,12 +29,18 @@ try:
 except Exception:
     HAVE_PIL = False
 
-HAVE_CV2 = False
-try:
-    import cv2  # type: ignore
-    HAVE_CV2 = True
-except Exception:
-    HAVE_CV2 = False
+# cv2 : importé à la première lecture de vidéo (ce module est chargé au démarrage pour ses routes)
+_CV2 = None
+
+def _cv2():
+    global _CV2
+    if _CV2 is None:
+        try:
+            import cv2  # type: ignore
+            _CV2 = cv2
+        except Exception:
+            _CV2 = False
+    return _CV2 or None
 
 # --------------------------------------------------------------------------------------
 SUPPORTED_IMAGE_EXT = [".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".svg"]
@@ -180,7 +186,8 @@ def _get_file_info(path: str) -> Dict[str, Any]:
             info["width"], info["height"] = im.size
         except Exception:
             pass
-    elif info["type"] == "video" and HAVE_CV2:
+    elif info["type"] == "video" and _cv2() is not None:
+        cv2 = _cv2()
         try:
             cap = cv2.VideoCapture(path)
             w = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# ComfyUI_DAO_master / image_utils.py
+# Conversions communes IMAGE/MASK (tensors ComfyUI float 0..1) <-> uint8 / PIL.
+# IMAGE = [B,H,W,C], MASK = [B,H,W]. Les conversions évitent les copies intermédiaires :
+# uint8 via mul/clamp_/round_ sur un seul tensor de travail, np.asarray sans copie côté PIL,
+# division directe dans un tensor de sortie (éventuellement fourni par l'appelant : `out=`).
+# _map_frames applique un traitement PIL frame par frame à tout un batch.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+
+try:
+    import torch
+except Exception:
+    torch = None
+
+_MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+
+
+# ---------- tensor -> uint8 ----------
+
+def _to_uint8(t, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Tensor/ndarray float 0..1 (toute forme) -> ndarray uint8 arrondi au plus proche.
+    Un seul tensor float de travail ; l'entrée n'est jamais modifiée. `out` : tableau uint8
+    de même forme, rempli en place (ex. une tranche d'un buffer de batch)."""
+    if isinstance(t, np.ndarray):
+        t = torch.from_numpy(t)
+    x = t.detach()
+    if x.device.type != "cpu" or x.dtype != torch.float32:
+        x = x.to("cpu", torch.float32)  # copie déjà faite : travail en place
+        x.mul_(255.0)
+    else:
+        x = x.mul(255.0)
+    x.clamp_(0.0, 255.0).round_()
+    if out is None:
+        return x.to(torch.uint8).numpy()
+    torch.from_numpy(out).copy_(x)
+    return out
+
+
+def _uint8_to_tensor(arr: np.ndarray, out: Optional["torch.Tensor"] = None) -> "torch.Tensor":
+    """uint8 (vue strided acceptée) -> tensor float32 0..1, en une passe directement dans
+    `out` (préalloué par l'appelant ou créé ici) : pas de copie intermédiaire."""
+    if out is None:
+        out = torch.empty(arr.shape, dtype=torch.float32)
+    np.divide(arr, np.float32(255.0), out=out.numpy(), dtype=np.float32)
+    return out
+
+
+# ---------- IMAGE / MASK -> PIL ----------
+
+def _frame(t, index: int = 0, ndim: int = 3):
+    """Image (ou masque si ndim=2) `index` d'un batch ; [C,H,W] remis en [H,W,C].
+    Un batch plus court que `index` répète sa dernière frame (ex. masque unique pour un batch)."""
+    if t is None:
+        raise ValueError("Image tensor is None")
+    if isinstance(t, np.ndarray):
+        t = torch.from_numpy(t)
+    if t.dim() == ndim + 1:
+        t = t[min(index, t.shape[0] - 1)]
+    if t.dim() != ndim:
+        raise ValueError(f"Unexpected tensor ndim={t.dim()}, expected {ndim} or {ndim + 1}.")
+    if ndim == 3 and t.shape[0] in (1, 3, 4) and t.shape[-1] not in (1, 3, 4):
+        t = t.permute(1, 2, 0)
+    return t
+
+
+def _image_to_pil(img, index: int = 0, mode: Optional[str] = None) -> Image.Image:
+    """IMAGE (frame `index`) -> PIL. Sans `mode` : RGBA (C=4), RGB (C=3), niveaux de gris -> RGBA.
+    `mode="RGBA"` / `"RGB"` force le mode de sortie (alpha ajouté opaque / retiré)."""
+    u8 = _to_uint8(_frame(img, index))
+    C = u8.shape[-1]
+    if C not in _MODES:
+        u8 = u8[..., :3] if C > 3 else u8[..., :1]
+        C = u8.shape[-1]
+    pil = Image.fromarray(u8[..., 0] if C == 1 else u8, _MODES[C])
+    target = mode or ("RGBA" if C == 1 else pil.mode)
+    return pil if pil.mode == target else pil.convert(target)
+
+
+def _mask_to_pil(mask, index: int = 0, size: Optional[Tuple[int, int]] = None) -> Optional[Image.Image]:
+    """MASK [B,H,W] / [H,W] (frame `index`) -> PIL 'L', redimensionné (LANCZOS) à `size` si besoin."""
+    if mask is None:
+        return None
+    m = Image.fromarray(_to_uint8(_frame(mask, index, ndim=2)), "L")
+    if size is not None and m.size != tuple(size):
+        m = m.resize(tuple(size), Image.LANCZOS)
+    return m
+
+
+def _alpha_to_pil(img: Image.Image) -> Image.Image:
+    """Canal alpha d'une image PIL en 'L' (opaque si l'image n'a pas d'alpha)."""
+    if img.mode == "RGBA":
+        return img.getchannel("A")
+    return Image.new("L", img.size, 255)
+
+
+# ---------- PIL -> IMAGE / MASK ----------
+
+def _pil_to_image(img: Image.Image, out: Optional["torch.Tensor"] = None,
+                  mode: Optional[str] = None) -> "torch.Tensor":
+    """PIL -> IMAGE [1,H,W,C]. Sans `mode` : RGB/RGBA conservés, modes avec alpha (LA, PA...)
+    -> RGBA, autres -> RGB ; `mode="RGB"` / `"RGBA"` force le nombre de canaux. `out` : tensor
+    [H,W,C] préalloué (ex. out_batch[i]), rempli en place ; le tensor [1,H,W,C] est alors une vue."""
+    target = mode or (img.mode if img.mode in ("RGB", "RGBA")
+                      else "RGBA" if "A" in img.getbands() else "RGB")
+    if img.mode != target:
+        img = img.convert(target)
+    arr = np.asarray(img)  # pas de copie
+    if torch is None:
+        return (arr.astype(np.float32) / 255.0)[None, ...]
+    return _uint8_to_tensor(arr, out).unsqueeze(0)
+
+
+def _pil_to_mask(img: Image.Image, out: Optional["torch.Tensor"] = None) -> "torch.Tensor":
+    """PIL -> MASK [1,H,W] (converti en 'L' si besoin). `out` : tensor [H,W] préalloué."""
+    if img.mode != "L":
+        img = img.convert("L")
+    arr = np.asarray(img)
+    if torch is None:
+        return (arr.astype(np.float32) / 255.0)[None, ...]
+    return _uint8_to_tensor(arr, out).unsqueeze(0)
+
+
+# ---------- batch ----------
+
+def _batch_len(*tensors) -> int:
+    """Taille de batch commune : le plus grand B des entrées IMAGE/MASK fournies (None ignorés)."""
+    return max([1] + [int(t.shape[0]) for t in tensors if t is not None])
+
+
+def _map_frames(frame_fn: Callable[[int], Sequence[Image.Image]], n: int, kinds: Sequence[str],
+                workers: int = 4) -> Tuple["torch.Tensor", ...]:
+    """Applique `frame_fn(i)` -> tuple d'images PIL à chaque frame i < n. Chaque sortie est écrite
+    directement dans un tensor [n,...] préalloué ; `kinds` donne son type ("IMAGE" ou "MASK").
+    La frame 0 fixe les formes, les suivantes tournent sur `workers` threads (PIL libère le GIL)."""
+    convert = {"IMAGE": _pil_to_image, "MASK": _pil_to_mask}
+    first = [convert[k](img) for k, img in zip(kinds, frame_fn(0))]
+    if n <= 1:
+        return tuple(first)
+    outs = []
+    for t in first:
+        buf = torch.empty((n,) + tuple(t.shape[1:]), dtype=torch.float32)
+        buf[0] = t[0]
+        outs.append(buf)
+
+    def store(i):
+        for k, img, buf in zip(kinds, frame_fn(i), outs):
+            if k == "MASK" and img.mode != "L":
+                img = img.convert("L")
+            elif k == "IMAGE" and img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            shape = (img.height, img.width) + ((len(img.getbands()),) if k == "IMAGE" else ())
+            if shape != tuple(buf.shape[1:]):
+                raise ValueError(f"Frame {i} : sortie {shape} différente de la frame 0 {tuple(buf.shape[1:])}.")
+            convert[k](img, out=buf[i])
+
+    workers = max(1, min(int(workers), n - 1, os.cpu_count() or 1))
+    if workers == 1:
+        for i in range(1, n):
+            store(i)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(store, range(1, n)))
+    return tuple(outs)
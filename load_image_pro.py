@@ -12,6 +12,8 @@ import cv2
 from PIL import Image
 import torch
 
+from .image_utils import _to_uint8, _uint8_to_tensor
+
 # --- ComfyUI imports (with fallbacks for standalone analysis) ---
 try:
     from folder_paths import get_full_path, get_filename_list
@@ -31,12 +33,10 @@ except ImportError:
 def _img_tensor_to_uint8(img: torch.Tensor) -> np.ndarray:
     if img is None: return None
     if not isinstance(img, torch.Tensor) or img.ndim != 4: raise ValueError("IMAGE tensor must be [B,H,W,C] float32 0..1")
-    arr = img[0].detach().cpu().numpy()
-    return (np.clip(arr, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+    return _to_uint8(img[0])
 
 def _img_uint8_to_tensor(arr: np.ndarray) -> torch.Tensor:
-    f = (arr.astype(np.float32) / 255.0)[None, ...]
-    return torch.from_numpy(f)
+    return _uint8_to_tensor(arr[None, ...])
 
 def _mask_tensor_to_float(mask: torch.Tensor, size_hw: Optional[Tuple[int, int]] = None) -> np.ndarray:
     if mask is None: return None
@@ -1,13 +1,23 @@
-import os, math, glob, time, re
-from typing import List, Tuple, Dict
+import os, math, glob, time, re, json, hashlib, struct, tempfile, zlib, fnmatch
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Dict, Callable, Iterable, Iterator, Any
 import numpy as np
 from PIL import Image
 
+from .image_utils import _to_uint8, _uint8_to_tensor
+
 try:
     import torch
 except Exception:
     torch = None
 
+try:
+    import imagecodecs  # optionnel : compressions TIFF lzw / zstd
+except Exception:
+    imagecodecs = None
+
 # ==== Utils communs ====
 
 def _tensor_to_numpy_single(img: "torch.Tensor") -> np.ndarray:
@@ -17,24 +27,17 @@ def _tensor_to_numpy_single(img: "torch.Tensor") -> np.ndarray:
         img = img[0]
     if img.ndim != 3:
         raise ValueError(f"Unexpected image ndim={img.ndim}, expected 3 or 4.")
-    arr = img.detach().cpu().numpy()
-    arr = np.clip(arr, 0.0, 1.0)
-    arr = (arr * 255.0 + 0.5).astype(np.uint8)
-    return arr
+    return _to_uint8(img)
 
 def _tensor_batch_to_numpy(imgs: "torch.Tensor") -> np.ndarray:
     if imgs is None or imgs.ndim != 4:
         raise ValueError("Expected IMAGE batch with shape (N,H,W,C).")
-    arr = imgs.detach().cpu().numpy()
-    arr = np.clip(arr, 0.0, 1.0)
-    arr = (arr * 255.0 + 0.5).astype(np.uint8)
-    return arr
+    return _to_uint8(imgs)
 
 def _numpy_to_tensor(arr: np.ndarray) -> "torch.Tensor":
     if arr.ndim == 3:
         arr = arr[None, ...]
-    t = torch.from_numpy(arr.astype(np.float32) / 255.0)
-    return t
+    return _uint8_to_tensor(arr)
 
 def _ensure_mode(arr: np.ndarray) -> Tuple[np.ndarray, str]:
     C = arr.shape[2]
@@ -61,6 +64,284 @@ def _save_pil(img: Image.Image, path: str, filetype: str, quality: int = 95) ->
     else:
         img.save(path)
 
+# ---- Écriture PNG par bandes (mode streaming) ----
+
+_STRIP_ROWS = 256
+_PREVIEW_MAX = 2048
+_INCREMENTAL_MAX_DIRTY = 0.25  # au-delà de cette fraction de tuiles modifiées : ré-assemblage complet
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+def _save_png_strips(arr: np.ndarray, path: str, strip_rows: int = _STRIP_ROWS, compress_level: int = 4) -> None:
+    """Écrit un PNG 8 bits RGB/RGBA bande par bande (filtre Sub) : seule une bande de
+    `strip_rows` lignes est lue à la fois, `arr` pouvant être un np.memmap."""
+    H, W, C = arr.shape
+    color_type = {3: 2, 4: 6}[C]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    comp = zlib.compressobj(compress_level)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", W, H, 8, color_type, 0, 0, 0)))
+        for y0 in range(0, H, strip_rows):
+            strip = np.asarray(arr[y0:y0+strip_rows]).reshape(-1, W*C)
+            rows = np.empty((strip.shape[0], W*C + 1), dtype=np.uint8)
+            rows[:, 0] = 1  # filtre Sub
+            rows[:, 1:C+1] = strip[:, :C]
+            np.subtract(strip[:, C:], strip[:, :-C], out=rows[:, C+1:])
+            data = comp.compress(rows.tobytes())
+            if data:
+                f.write(_png_chunk(b"IDAT", data))
+        f.write(_png_chunk(b"IDAT", comp.flush()))
+        f.write(_png_chunk(b"IEND", b""))
+
+# ---- Écriture TIFF tuilé / BigTIFF (mode streaming) ----
+
+_TIFF_COMPRESSION = {"none": 1, "lzw": 5, "deflate": 8, "zstd": 50000}
+# expansion maximale des données compressées (zlib/zstd : compressBound ; LZW 8 bits : codes <= 12 bits)
+_TIFF_EXPANSION = {"none": 1.0, "deflate": 1.001, "zstd": 1.01, "lzw": 1.5}
+
+def _tiff_needs_big(width: int, height: int, channels: int, tile: int, compression: str) -> bool:
+    """BigTIFF si le pire cas du fichier classique dépasse 2^32 octets : tuiles de bord écrites
+    pleines (taille complétée), expansion de la compression, octet d'alignement et entrées des
+    tables d'offsets par tuile, en-tête + IFD."""
+    n_tiles = -(-width // tile) * -(-height // tile)
+    tile_bytes = tile * tile * channels * _TIFF_EXPANSION.get(compression, 1.5) + 64
+    return n_tiles * (tile_bytes + 1 + 8) + 4096 >= 2**32
+
+def _tiff_encoder(compression: str) -> Callable[[bytes], bytes]:
+    if compression == "none":
+        return bytes
+    if compression == "deflate":
+        return lambda b: zlib.compress(b, 6)
+    if imagecodecs is None:
+        raise RuntimeError(f"Compression TIFF '{compression}' : le module 'imagecodecs' est requis (pip install imagecodecs).")
+    return imagecodecs.lzw_encode if compression == "lzw" else imagecodecs.zstd_encode
+
+class _TiledTiffWriter:
+    """TIFF tuilé (RGB/RGBA 8 bits, prédicteur horizontal) écrit au fil de l'eau : chaque rangée
+    de tuiles TIFF est compressée en parallèle (zlib libère le GIL) dès que les lignes du canvas
+    qui la couvrent sont définitives ; l'IFD est écrit à la fin. BigTIFF au-delà de ~4 Go."""
+
+    def __init__(self, path: str, width: int, height: int, channels: int, tile: int = 256,
+                 compression: str = "deflate", workers: int = 4):
+        self.W, self.H, self.C = width, height, channels
+        self.T = max(16, int(tile) // 16 * 16)  # TileWidth/TileLength multiples de 16
+        self.compression = compression
+        self._encode = _tiff_encoder(compression)
+        self.big = _tiff_needs_big(width, height, channels, self.T, compression)
+        self.offsets: List[int] = []
+        self.counts: List[int] = []
+        self.next_row = 0  # prochaine ligne du canvas à écrire (multiple de T)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.f = open(path, "wb")
+        self.f.write(b"II+\x00" + struct.pack("<HHQ", 8, 0, 0) if self.big else b"II*\x00" + struct.pack("<I", 0))
+        self.pool = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+
+    def _tile_bytes(self, band: np.ndarray, x0: int) -> bytes:
+        T, C = self.T, self.C
+        tile = np.zeros((T, T, C), dtype=np.uint8)  # tuiles de bord complétées par des zéros
+        blk = band[:, x0:x0+T]
+        tile[:blk.shape[0], :blk.shape[1]] = blk
+        if self.compression != "none":
+            tile[:, 1:] = np.diff(tile, axis=1)  # prédicteur 2 (différence horizontale modulo 256)
+        return self._encode(tile.tobytes())
+
+    def write_until(self, canvas: np.ndarray, y: int) -> None:
+        """Écrit toutes les rangées de tuiles TIFF entièrement situées au-dessus de la ligne `y`."""
+        T = self.T
+        while self.next_row < self.H and (self.next_row + T <= y or y >= self.H):
+            band = np.asarray(canvas[self.next_row:self.next_row+T])
+            for data in self.pool.map(lambda x0: self._tile_bytes(band, x0), range(0, self.W, T)):
+                self.offsets.append(self.f.tell()); self.counts.append(len(data))
+                self.f.write(data)
+                if self.f.tell() & 1:
+                    self.f.write(b"\x00")  # offsets alignés sur un mot
+            self.next_row += T
+
+    def close(self, canvas: np.ndarray = None) -> None:
+        try:
+            if canvas is not None:
+                self.write_until(canvas, self.H)
+            self._write_ifd()
+        finally:
+            self.pool.shutdown()
+            self.f.close()
+
+    def abort(self) -> None:
+        if not self.f.closed:
+            self.pool.shutdown(cancel_futures=True)
+            self.f.close()
+
+    def _write_ifd(self) -> None:
+        SHORT, LONG, LONG8 = 3, 4, 16
+        big = self.big
+        off_type = LONG8 if big else LONG
+        tags = [
+            (256, LONG, [self.W]), (257, LONG, [self.H]), (258, SHORT, [8] * self.C),
+            (259, SHORT, [_TIFF_COMPRESSION[self.compression]]), (262, SHORT, [2]),
+            (277, SHORT, [self.C]), (284, SHORT, [1]),
+            (317, SHORT, [1 if self.compression == "none" else 2]),
+            (322, SHORT, [self.T]), (323, SHORT, [self.T]),
+            (324, off_type, self.offsets), (325, off_type, self.counts),
+        ]
+        if self.C == 4:
+            tags.append((338, SHORT, [2]))  # alpha non prémultiplié
+        fmt = {SHORT: "H", LONG: "I", LONG8: "Q"}
+        inline = 8 if big else 4
+        ifd_pos = self.f.tell()
+        entry_size = 20 if big else 12
+        head = 8 if big else 2
+        extra_pos = ifd_pos + head + len(tags) * entry_size + inline
+        entries, extra = [], b""
+        for tag, typ, vals in tags:
+            data = struct.pack("<%d%s" % (len(vals), fmt[typ]), *vals)
+            if len(data) <= inline:
+                field = data.ljust(inline, b"\x00")
+            else:
+                field = struct.pack("<Q" if big else "<I", extra_pos + len(extra))
+                extra += data + (b"\x00" if len(data) & 1 else b"")
+            entries.append(struct.pack("<HHQ" if big else "<HHI", tag, typ, len(vals)) + field)
+        self.f.write(struct.pack("<Q" if big else "<H", len(tags)) + b"".join(entries)
+                     + (b"\x00" * inline) + extra)
+        self.f.seek(8 if big else 4)
+        self.f.write(struct.pack("<Q" if big else "<I", ifd_pos))
+
+def _save_tiff(arr: np.ndarray, path: str, compression: str = "deflate", tile: int = 256, workers: int = 4) -> None:
+    H, W, C = arr.shape
+    _TiledTiffWriter(path, W, H, C, tile=tile, compression=compression, workers=workers).close(arr)
+
+def _bg_fill(rgba: bool, bg_rgb=(0,0,0), bg_alpha: int = 0) -> np.ndarray:
+    return np.array(list(bg_rgb) + ([int(np.clip(bg_alpha,0,255))] if rgba else []), dtype=np.uint8)
+
+def _make_memmap_canvas(width: int, height: int, rgba: bool, bg_rgb=(0,0,0), bg_alpha: int = 0,
+                        directory: str = None, path: str = None) -> Tuple[np.ndarray, str]:
+    """Canvas disque rempli bande par bande avec la couleur de fond. Sans `path`, fichier
+    temporaire brut (np.memmap) ; avec `path`, fichier .npy persistant (rechargeable)."""
+    C = 4 if rgba else 3
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="mosaic_", suffix=".raw", dir=directory)
+        os.close(fd)
+        canvas = np.memmap(path, dtype=np.uint8, mode="w+", shape=(height, width, C))
+    else:
+        canvas = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(height, width, C))
+    fill = _bg_fill(rgba, bg_rgb, bg_alpha)
+    for y0 in range(0, height, _STRIP_ROWS):
+        canvas[y0:y0+_STRIP_ROWS] = fill
+    return canvas, path
+
+def _strided_preview(canvas: np.ndarray, max_side: int = _PREVIEW_MAX) -> np.ndarray:
+    """Aperçu sous-échantillonné (plus proche voisin) d'un canvas potentiellement énorme."""
+    step = max(1, math.ceil(max(canvas.shape[0], canvas.shape[1]) / max_side))
+    return np.ascontiguousarray(canvas[::step, ::step])
+
+def _ordered_prefetch(fn: Callable[[Any], Any], items: Iterable[Any], workers: int = 1,
+                      prefetch: int = 0) -> Iterator[Any]:
+    """Applique `fn` à chaque élément sur un pool de threads et rend les résultats
+    dans l'ordre d'entrée ; au plus `prefetch` (défaut 2*workers) éléments sont en vol.
+    `items` est consommé paresseusement, un générateur borne donc aussi la mémoire d'entrée."""
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    depth = max(workers, prefetch or 2*workers)
+    it = iter(items)
+    ex = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = deque(ex.submit(fn, item) for _, item in zip(range(depth), it))
+        while pending:
+            res = pending.popleft().result()
+            for item in it:
+                pending.append(ex.submit(fn, item))
+                break
+            yield res
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+def _save_tile_job(job) -> str:
+    """Encode + écrit une tuile (PIL relâche le GIL pendant l'encodage)."""
+    tile, mode, fpath, filetype, quality = job
+    _save_pil(Image.fromarray(tile, mode=mode), fpath, filetype=filetype, quality=quality)
+    return fpath
+
+# ---- Pyramide multi-résolution (deep zoom) ----
+
+def _downsample2x(arr: np.ndarray) -> np.ndarray:
+    """Réduction 2x (moyenne de blocs 2x2, bords impairs répliqués), calculée par bandes
+    pour ne jamais matérialiser de copie pleine résolution."""
+    H, W, C = arr.shape
+    H2, W2 = (H+1)//2, (W+1)//2
+    out = np.empty((H2, W2, C), dtype=np.uint8)
+    for y in range(0, H2, _STRIP_ROWS):
+        band = np.asarray(arr[2*y:2*(y+_STRIP_ROWS)])
+        if band.shape[0] % 2:
+            band = np.concatenate([band, band[-1:]], axis=0)
+        if W % 2:
+            band = np.concatenate([band, band[:, -1:]], axis=1)
+        acc = band.reshape(band.shape[0]//2, 2, W2, 2, C).sum(axis=(1, 3), dtype=np.uint16)
+        out[y:y+acc.shape[0]] = ((acc + 2) // 4).astype(np.uint8)
+    return out
+
+def _write_pyramid(img: np.ndarray, mode: str, out_dir: str, basename: str, layout: str,
+                   tile_size: int, filetype: str, quality: int,
+                   workers: int = 1) -> str:
+    """Écrit une pyramide DZI ({basename}_files/{level}/{col}_{row}) ou XYZ ({z}/{x}/{y})
+    + un manifest JSON. Chaque niveau est dérivé du précédent (réduction 2x), seul le
+    niveau courant et le suivant coexistent en mémoire. DZI : niveaux 0 (1 px) .. max_level ;
+    XYZ : z=0 est le premier niveau tenant dans une seule tuile (convention slippy map), les
+    niveaux plus petits ne sont pas écrits. Retourne le chemin du manifest."""
+    H, W = img.shape[0], img.shape[1]
+    ts_ = max(1, int(tile_size))
+    max_level = int(math.ceil(math.log2(max(H, W, 1))))
+    ext = "jpg" if filetype in ("jpg", "jpeg") else "png"
+    root = os.path.join(out_dir, f"{basename}_files" if layout == "dzi" else f"{basename}_xyz")
+    min_level = 0
+    if layout != "dzi":
+        # niveau DZI (tailles ceil(/2) successives) de la première image tenant dans une tuile -> z=0
+        h, w, min_level = H, W, max_level
+        while min_level > 0 and max(h, w) > ts_:
+            h, w, min_level = (h + 1) // 2, (w + 1) // 2, min_level - 1
+
+    levels = []
+    cur = img
+    for level in range(max_level, min_level - 1, -1):
+        h, w = cur.shape[0], cur.shape[1]
+        n_rows, n_cols = math.ceil(h / ts_), math.ceil(w / ts_)
+
+        def jobs(cur=cur, z=level - min_level, n_rows=n_rows, n_cols=n_cols):  # z=0 : niveau le plus réduit
+            for r in range(n_rows):
+                for c in range(n_cols):
+                    tile = cur[r*ts_:(r+1)*ts_, c*ts_:(c+1)*ts_]
+                    name = (os.path.join(root, str(z), f"{c}_{r}.{ext}") if layout == "dzi"
+                            else os.path.join(root, str(z), str(c), f"{r}.{ext}"))
+                    yield (tile, mode, name, ext, quality)
+
+        for _ in _ordered_prefetch(_save_tile_job, jobs(), workers=int(workers)):
+            pass
+        levels.append({"level": level - min_level, "width": w, "height": h, "cols": n_cols, "rows": n_rows})
+        if level > min_level:
+            cur = _downsample2x(cur)
+
+    manifest = {
+        "layout": layout, "format": ext, "tile_size": ts_, "overlap": 0,
+        "width": W, "height": H, "min_level": 0, "max_level": max_level - min_level,
+        "root": root, "levels": sorted(levels, key=lambda d: d["level"]),
+    }
+    if layout != "dzi":
+        # minzoom/maxzoom pour la config du viewer ; z_offset : niveau DZI équivalent à z=0
+        manifest.update({"minzoom": 0, "maxzoom": max_level - min_level, "z_offset": min_level})
+    if layout == "dzi":
+        dzi_path = os.path.join(out_dir, f"{basename}.dzi")
+        with open(dzi_path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{ts_}" '
+                    f'Overlap="0" Format="{ext}"><Size Width="{W}" Height="{H}"/></Image>\n')
+        manifest["dzi"] = dzi_path
+    manifest_path = os.path.join(out_dir, f"{basename}_pyramid.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
 def _parse_hex_color(hex_str: str) -> Tuple[int, int, int]:
     s = hex_str.strip().lstrip("#")
     if len(s) == 3:
@@ -94,28 +375,37 @@ def _index_to_rowcol(idx: int, rows: int, cols: int, mode: str) -> Tuple[int,int
 
 # ---- Blend helpers ----
 
-def _alpha_over(dst: np.ndarray, src: np.ndarray) -> np.ndarray:
-    # src over dst; handle RGB or RGBA
-    if dst.shape[2] == 4:
-        Cd = dst[...,:3].astype(np.float32); Ad = (dst[...,3:4].astype(np.float32))/255.0
-    else:
-        Cd = dst.astype(np.float32); Ad = np.ones(dst.shape[:2]+(1,), np.float32)
-
-    if src.shape[2] == 4:
-        Cs = src[...,:3].astype(np.float32); As = (src[...,3:4].astype(np.float32))/255.0
-    else:
-        Cs = src.astype(np.float32); As = np.ones(src.shape[:2]+(1,), np.float32)
-
-    Co = Cs + Cd * (1.0 - As)
-    Ao = As + Ad * (1.0 - As)
+def _div255_u16(t: np.ndarray) -> np.ndarray:
+    """floor(t/255) en place, exact pour 0 <= t <= 65534 (uint16)."""
+    q = t >> 8
+    q += 1
+    t += q
+    t >>= 8
+    return t
 
-    out_rgb = np.clip(Co, 0, 255)
+def _alpha_over_u16(dst: np.ndarray, src: np.ndarray) -> None:
+    """src over dst, en place dans `dst` (tranche uint8 du canvas), arithmétique entière uint16 :
+    Co = Cs + Cd*(255-As)/255, Ao = As + Ad*(255-As)/255 (couleur source prémultipliée).
+    Sans conversion float ni concaténation ; RGB ou RGBA des deux côtés."""
+    if src.shape[2] != 4:
+        dst[..., :3] = src[..., :3]
+        if dst.shape[2] == 4:
+            dst[..., 3] = 255
+        return
+    inv = np.subtract(255, src[..., 3:4], dtype=np.uint16)  # 255 - As
     if dst.shape[2] == 4:
-        out_a = np.clip(Ao*255.0, 0, 255)
-        out = np.concatenate([out_rgb, out_a], axis=2).astype(np.uint8)
-    else:
-        out = out_rgb.astype(np.uint8)
-    return out
+        # RGBA sur RGBA : couleur et alpha suivent la même formule, un seul passage sur 4 canaux
+        t = np.multiply(dst, inv, dtype=np.uint16)
+        _div255_u16(t)
+        t += src
+        np.minimum(t, 255, out=t)
+        dst[:] = t
+        return
+    t = np.multiply(dst[..., :3], inv, dtype=np.uint16)
+    _div255_u16(t)
+    t += src[..., :3]
+    np.minimum(t, 255, out=t)
+    dst[..., :3] = t
 
 def _apply_op(dst: np.ndarray, src: np.ndarray, op: str) -> np.ndarray:
     # operates channel-wise (on all channels; alpha treated like color if present)
@@ -157,23 +447,154 @@ def _feather_mask(h: int, w: int, fx: int, fy: int, mode: str = "linear") -> np.
     mask = wy[:,None] * wx[None,:]
     return mask[...,None]  # (h,w,1)
 
+@lru_cache(maxsize=64)
+def _feather_mask_cached(h: int, w: int, fx: int, fy: int, mode: str = "linear") -> np.ndarray:
+    """_feather_mask mémoïsé (lecture seule) : les tuiles intérieures partagent toutes le même masque."""
+    mask = _feather_mask(h, w, fx, fy, mode)
+    mask.setflags(write=False)
+    return mask
+
+# modes à accumulation normalisée -> type de rampe
+_NORMALIZED_MODES = {"feather_linear_norm": "linear", "feather_cosine_norm": "cosine"}
+_MIN_WEIGHT = 1e-3  # plancher : un bord sans voisin garde la couleur de sa tuile
+
+class _WeightAccumulator:
+    """Fusion normalisée : somme des poids + somme pondérée, puis division à la fin.
+    Le résultat ne dépend pas de l'ordre de placement des tuiles. Avec `directory`,
+    les buffers float32 sont des np.memmap (mode streaming)."""
+
+    def __init__(self, H: int, W: int, C: int, tile_h: int, tile_w: int,
+                 feather_px: int, kind: str = "linear", directory: str = None):
+        self._tmp = []
+        self.acc = self._buffer((H, W, C), directory)
+        self.wsum = self._buffer((H, W, 1), directory)
+        f = max(0, int(feather_px))
+        self.weights = np.maximum(_feather_mask_cached(tile_h, tile_w, f, f, kind), np.float32(_MIN_WEIGHT))
+
+    def _buffer(self, shape, directory):
+        if directory is None:
+            return np.zeros(shape, np.float32)
+        fd, path = tempfile.mkstemp(prefix="mosaic_acc_", suffix=".raw", dir=directory)
+        os.close(fd)
+        self._tmp.append(path)
+        return np.memmap(path, dtype=np.float32, mode="w+", shape=shape)  # fichier neuf = zéros
+
+    def add(self, src: np.ndarray, y0: int, x0: int, dy: int = 0, dx: int = 0) -> None:
+        """Ajoute `src` (déjà cropée) en (y0,x0) ; (dy,dx) = décalage du crop dans la tuile."""
+        h, w = src.shape[0], src.shape[1]
+        wgt = self.weights[dy:dy+h, dx:dx+w]
+        self.acc[y0:y0+h, x0:x0+w] += src * wgt
+        self.wsum[y0:y0+h, x0:x0+w] += wgt
+
+    def resolve(self, canvas: np.ndarray) -> None:
+        """Écrit acc/wsum dans `canvas` (uint8) par bandes ; les pixels non couverts gardent le fond."""
+        H = canvas.shape[0]
+        for y0 in range(0, H, _STRIP_ROWS):
+            y1 = min(y0 + _STRIP_ROWS, H)
+            ws = np.asarray(self.wsum[y0:y1])
+            covered = ws[..., 0] > 0
+            out = np.asarray(self.acc[y0:y1]) / np.maximum(ws, np.float32(1e-12))
+            strip = canvas[y0:y1]
+            strip[covered] = np.clip(out[covered] + 0.5, 0, 255).astype(np.uint8)
+
+    def close(self) -> None:
+        self.acc = self.wsum = None
+        for path in self._tmp:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._tmp = []
+
+# ---- Fusion multi-bandes (pyramides de Laplace) limitée aux bandes de recouvrement ----
+
+_MB_LEVELS = 5
+_G5 = np.array([1, 4, 6, 4, 1], dtype=np.float32) / 16.0
+
+def _blur5(a: np.ndarray) -> np.ndarray:
+    """Flou gaussien séparable 5 taps (bords répliqués) sur (h,w,C) float32."""
+    h, w = a.shape[0], a.shape[1]
+    p = np.pad(a, ((2,2),(0,0),(0,0)), mode="edge")
+    a = sum(_G5[k] * p[k:k+h] for k in range(5))
+    p = np.pad(a, ((0,0),(2,2),(0,0)), mode="edge")
+    return sum(_G5[k] * p[:, k:k+w] for k in range(5))
+
+def _pyr_down(a: np.ndarray) -> np.ndarray:
+    return _blur5(a)[::2, ::2]
+
+def _pyr_up(a: np.ndarray, shape) -> np.ndarray:
+    return _blur5(np.repeat(np.repeat(a, 2, axis=0), 2, axis=1)[:shape[0], :shape[1]])
+
+def _multiband_blend(a: np.ndarray, b: np.ndarray, mask: np.ndarray, levels: int = _MB_LEVELS) -> np.ndarray:
+    """Mélange de Burt-Adelson : pyramides de Laplace de a et b combinées par la pyramide
+    gaussienne de `mask` (poids de b, (h,w,1)). Le nombre de niveaux est borné par la taille."""
+    levels = min(int(levels), int(math.log2(max(1, min(a.shape[0], a.shape[1])))))
+    if levels < 1:
+        return a + (b - a) * mask
+    ga, gb, gm = [a], [b], [mask]
+    for _ in range(levels):
+        ga.append(_pyr_down(ga[-1])); gb.append(_pyr_down(gb[-1])); gm.append(_pyr_down(gm[-1]))
+    out = ga[-1] + (gb[-1] - ga[-1]) * gm[-1]
+    for i in range(levels-1, -1, -1):
+        la = ga[i] - _pyr_up(ga[i+1], ga[i].shape)
+        lb = gb[i] - _pyr_up(gb[i+1], gb[i].shape)
+        out = _pyr_up(out, ga[i].shape) + la + (lb - la) * gm[i]
+    return out
+
+def _overlap_sides(r: int, c: int, placed) -> Tuple[str, ...]:
+    """Côtés de la case (r,c) déjà recouverts par une tuile placée auparavant."""
+    return tuple(side for side, rc in (("left",(r,c-1)), ("right",(r,c+1)), ("top",(r-1,c)), ("bottom",(r+1,c)))
+                 if rc in placed)
+
+def _multiband_place(canvas: np.ndarray, src: np.ndarray, y0: int, x0: int, dy: int, dx: int,
+                     tile_h: int, tile_w: int, ox: int, oy: int, sides, levels: int = _MB_LEVELS) -> None:
+    """Place `src` (tuile cropée de (dy,dx)) en (y0,x0) ; seules les bandes de recouvrement
+    (ox/oy px) avec les voisins déjà placés (`sides`) sont fusionnées en multi-bandes, une
+    bande à la fois, le reste est copié tel quel : le coût suit l'aire de recouvrement."""
+    h, w = src.shape[0], src.shape[1]
+    dst = canvas[y0:y0+h, x0:x0+w]
+    out = None
+    for side in sides:
+        horiz = side in ("left", "right")
+        o, full, off, length = (ox, tile_w, dx, w) if horiz else (oy, tile_h, dy, h)
+        if o <= 0:
+            continue
+        a0 = 0 if side in ("left", "top") else full - o
+        s0, s1 = max(a0 - off, 0), min(a0 + o - off, length)
+        if s1 <= s0:
+            continue
+        # marche au milieu de la bande : poids de la nouvelle tuile (lissé par la pyramide)
+        step = (np.arange(a0, a0 + o) - a0) >= (o / 2.0)
+        if side in ("right", "bottom"):
+            step = ~step
+        step = step[s0 + off - a0:s1 + off - a0].astype(np.float32)
+        if out is None:
+            out = src.astype(np.float32)
+        if horiz:
+            m = np.ascontiguousarray(np.broadcast_to(step[None, :, None], (h, s1 - s0, 1)))
+            out[:, s0:s1] = _multiband_blend(dst[:, s0:s1].astype(np.float32), out[:, s0:s1], m, levels)
+        else:
+            m = np.ascontiguousarray(np.broadcast_to(step[:, None, None], (s1 - s0, w, 1)))
+            out[s0:s1] = _multiband_blend(dst[s0:s1].astype(np.float32), out[s0:s1], m, levels)
+    dst[:] = src if out is None else np.clip(out + 0.5, 0, 255).astype(np.uint8)
+
 def _blend_place(dst: np.ndarray, src: np.ndarray, y: int, x: int, *,
                  mode: str = "last", weighted_w: float = 0.5,
-                 feather_px: int = 0, feather_kind: str = "linear"):
+                 feather_px: int = 0, feather_kind: str = "linear", mask: np.ndarray = None):
     Hs, Ws = src.shape[0], src.shape[1]
     patch = dst[y:y+Hs, x:x+Ws, :]
 
     if mode == "alpha_over":
-        patch[:] = _alpha_over(patch, src)
+        _alpha_over_u16(patch, src)
         return
 
     if mode in ("feather_linear","feather_cosine"):
         fk = "cosine" if mode.endswith("cosine") else "linear"
         fx = fy = max(0, int(feather_px))
-        mask = _feather_mask(Hs, Ws, fx, fy, fk).astype(np.float32)
-        src_f = src.astype(np.float32)
+        if mask is None:
+            mask = _feather_mask_cached(Hs, Ws, fx, fy, fk)
         dst_f = patch.astype(np.float32)
-        out = dst_f * (1.0 - mask) + src_f * mask
+        out = dst_f + (src - dst_f) * mask
         patch[:] = np.clip(out, 0, 255).astype(np.uint8)
         return
 
@@ -188,6 +609,83 @@ def _blend_place(dst: np.ndarray, src: np.ndarray, y: int, x: int, *,
     # compositing ops
     patch[:] = _apply_op(patch, src, op=mode)
 
+# ==== Moteur de traitement par tuiles (split -> callback -> reblend) ====
+
+def _tile_starts(n: int, t: int, step: int) -> List[int]:
+    """Débuts de tuiles de taille t (pas `step`) couvrant [0,n) ; la dernière est recalée sur le bord."""
+    if t >= n:
+        return [0]
+    starts = list(range(0, n - t + 1, max(1, step)))
+    if starts[-1] + t < n:
+        starts.append(n - t)
+    return starts
+
+def _iter_tiles(img: np.ndarray, tile_h: int, tile_w: int, overlap: int = 0) -> Iterator[Tuple[int, int, int, int, np.ndarray]]:
+    """Générateur paresseux de tuiles (r, c, y0, x0, vue) en row-major ; les tuiles se
+    recouvrent de `overlap` px (plus sur la dernière ligne/colonne, recalée sur le bord)."""
+    H, W = img.shape[0], img.shape[1]
+    th, tw = min(tile_h, H), min(tile_w, W)
+    ys = _tile_starts(H, th, th - overlap)
+    xs = _tile_starts(W, tw, tw - overlap)
+    for r, y0 in enumerate(ys):
+        for c, x0 in enumerate(xs):
+            yield r, c, y0, x0, img[y0:y0+th, x0:x0+tw]
+
+def _run_tiled(img: np.ndarray, fn: Callable[[np.ndarray, int, int], np.ndarray], tile_h: int = 1024,
+               tile_w: int = 1024, overlap: int = 64, blend: str = "center", feather_px: int = None,
+               workers: int = 1, out: np.ndarray = None) -> np.ndarray:
+    """Découpe `img` (H,W,C uint8) en tuiles, applique `fn(tuile, y0, x0)` (même taille
+    spatiale, uint8) puis réassemble :
+    - 'center' : chaque tuile n'écrit que sa zone propre (milieu des recouvrements) ; exact pour
+      un filtre local dont le rayon est <= overlap/2 ;
+    - modes *_norm : accumulation normalisée par bandes d'une ligne de tuiles (mémoire bornée) ;
+    - autres modes : `_blend_place` séquentiel, comme les nodes d'assemblage.
+    `out` peut être fourni (ex. np.memmap) ; `fn` tourne sur `workers` threads."""
+    H, W = img.shape[0], img.shape[1]
+    th, tw = min(tile_h, H), min(tile_w, W)
+    ys = _tile_starts(H, th, th - overlap)
+    xs = _tile_starts(W, tw, tw - overlap)
+    tiles = _iter_tiles(img, tile_h, tile_w, overlap)
+    results = _ordered_prefetch(lambda t: (t, fn(t[4], t[2], t[3])), tiles, workers=int(workers))
+
+    def own(starts, i, size, n):
+        # zone propre de la i-ème tuile : du milieu du recouvrement précédent au suivant
+        a = 0 if i == 0 else (starts[i] + starts[i-1] + size) // 2
+        b = n if i == len(starts) - 1 else (starts[i+1] + starts[i] + size) // 2
+        return a, b
+
+    f = overlap // 2 if feather_px is None else max(0, int(feather_px))
+    band, band_y0 = None, 0
+    for (r, c, y0, x0, _), res in results:
+        res = np.asarray(res)
+        if res.ndim == 2:
+            res = res[..., None]
+        if res.shape[0] != th or res.shape[1] != tw:
+            raise ValueError(f"Le callback doit conserver la taille de tuile ({th}x{tw}), reçu {res.shape[:2]}.")
+        if out is None:
+            out = np.zeros((H, W, res.shape[2]), dtype=np.uint8)
+
+        if blend in _NORMALIZED_MODES:
+            # bande = une ligne de tuiles ; les lignes au-dessus du début de la suivante sont finales
+            if c == 0:
+                carry = band
+                band = _WeightAccumulator(th, W, res.shape[2], th, tw, f, _NORMALIZED_MODES[blend])
+                k = 0 if carry is None else th - (y0 - band_y0)
+                if k > 0:  # recouvrement vertical hérité de la ligne précédente (aucun si overlap=0)
+                    band.acc[:k] += carry.acc[-k:]; band.wsum[:k] += carry.wsum[-k:]
+                band_y0 = y0
+            band.add(res, 0, x0)
+            if c == len(xs) - 1:
+                y_next = ys[r+1] if r + 1 < len(ys) else H
+                band.resolve(out[y0:y_next])
+        elif blend == "center":
+            a, b = own(ys, r, th, H)
+            l, rr = own(xs, c, tw, W)
+            out[a:b, l:rr] = res[a-y0:b-y0, l-x0:rr-x0]
+        else:
+            _blend_place(out[y0:y0+th, x0:x0+tw], res, 0, 0, mode=blend, feather_px=f)
+    return out
+
 # ==== Node 1: Tile & Export ====
 
 class MosaicTileExport:
@@ -205,6 +703,9 @@ class MosaicTileExport:
                 "quality": ("INT", {"default": 95, "min": 1, "max": 100}),
                 "basename": ("STRING", {"default": "tiles"}),
                 "subfolder": ("STRING", {"default": ""}),
+                "export_workers": ("INT", {"default": 4, "min": 1, "max": 64}),
+                "pyramid": (["none", "dzi", "xyz"], {"default": "none"}),
+                "pyramid_tile": ("INT", {"default": 256, "min": 16, "max": 4096}),
             },
         }
 
@@ -231,16 +732,14 @@ class MosaicTileExport:
         canvas[:H,:W,:arr.shape[2]] = arr
         return canvas
 
-    def _slice_grid(self, base, rows, cols, th, tw):
-        tiles = []
-        for r in range(rows):
-            for c in range(cols):
-                y0, x0 = r*th, c*tw
-                tiles.append(base[y0:y0+th, x0:x0+tw, :])
-        return tiles
+    def _grid_view(self, base, rows, cols, th, tw):
+        # (H,W,C) -> (rows,cols,th,tw,C) par reshape + transpose : vue, aucune copie
+        C = base.shape[2]
+        return base.reshape(rows, th, cols, tw, C).transpose(0, 2, 1, 3, 4)
 
     def tile_and_export(self, image, rows, cols, fit_mode="crop",
-                        filetype="png", quality=95, basename="tiles", subfolder=""):
+                        filetype="png", quality=95, basename="tiles", subfolder="",
+                        export_workers=4, pyramid="none", pyramid_tile=256):
         if torch is None:
             raise RuntimeError("PyTorch requis par ComfyUI n'est pas disponible.")
         np_img = _tensor_to_numpy_single(image)
@@ -248,7 +747,7 @@ class MosaicTileExport:
         H, W, _ = np_img.shape
         th, tw, used_H, used_W = self._compute_tile_sizes(H, W, rows, cols, fit_mode)
         base = np_img[:used_H,:used_W,:] if fit_mode=="crop" else self._pad_canvas(np_img, used_H, used_W, mode)
-        tiles = self._slice_grid(base, rows, cols, th, tw)
+        grid = self._grid_view(base, rows, cols, th, tw)
 
         root_out = os.path.join("output","tiles"); ts = time.strftime("%Y%m%d-%H%M%S")
         safe_sub = subfolder.strip().replace("\\","/")
@@ -256,16 +755,21 @@ class MosaicTileExport:
                   else os.path.join(root_out, f"{basename}_{rows}x{cols}_{ts}")
         os.makedirs(out_dir, exist_ok=True)
 
-        saved = []
-        for i,tile in enumerate(tiles):
-            r, c = i//cols, i%cols
-            pil = Image.fromarray(tile, mode=mode)
-            fpath = os.path.join(out_dir, f"{basename}_r{r:02d}_c{c:02d}.{filetype}")
-            _save_pil(pil, fpath, filetype=filetype, quality=quality)
-            saved.append(fpath)
+        # Encodage concurrent (threads) ; le générateur ne produit que les tuiles en vol (vues de la grille)
+        jobs = ((grid[r, c], mode,
+                 os.path.join(out_dir, f"{basename}_r{r:02d}_c{c:02d}.{filetype}"),
+                 filetype, quality)
+                for r in range(rows) for c in range(cols))
+        saved = list(_ordered_prefetch(_save_tile_job, jobs, workers=int(export_workers)))
+
+        # Pyramide deep zoom de l'image complète (en plus de la grille)
+        if pyramid in ("dzi", "xyz"):
+            saved.append(_write_pyramid(np_img, mode, out_dir, basename, pyramid, pyramid_tile,
+                                        filetype, quality, workers=int(export_workers)))
 
-        batch = np.stack(tiles, axis=0)
-        return (_numpy_to_tensor(batch), out_dir + "\n" + "\n".join(saved))
+        # (rows,cols,th,tw,C) contigu côté torch -> (N,th,tw,C) sans copie
+        batch = _uint8_to_tensor(grid).view(rows*cols, th, tw, grid.shape[-1])
+        return (batch, out_dir + "\n" + "\n".join(saved))
 
 # ==== Node 2: Assemble (Batch) ====
 
@@ -287,18 +791,21 @@ class MosaicTileAssemble:
                 "overlap_y": ("INT", {"default": 0, "min": 0, "max": 4096}),
                 "overlap_blend": ([
                     "last","average","alpha_over","add","multiply","screen","lighten","darken","max","min",
-                    "weighted","feather_linear","feather_cosine"
+                    "weighted","feather_linear","feather_cosine","feather_linear_norm","feather_cosine_norm",
+                    "multiband"
                 ], {"default": "last"}),
                 "blend_weight": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 1.0}),
                 "feather_px": ("INT", {"default": 0, "min": 0, "max": 2048}),
 
                 "export": ("BOOLEAN", {"default": False}),
-                "filetype": (["png","jpg"], {"default":"png"}),
+                "filetype": (["png","jpg","tiff"], {"default":"png"}),
                 "quality": ("INT", {"default":95, "min":1, "max":100}),
                 "basename": ("STRING", {"default":"mosaic"}),
                 "subfolder": ("STRING", {"default":""}),
                 "bg_color": ("STRING", {"default":"#000000"}),
                 "bg_alpha": ("INT", {"default":0, "min":0, "max":255}),
+                "tiff_compression": (["deflate","none","lzw","zstd"], {"default":"deflate"}),
+                "tiff_tile": ("INT", {"default":256, "min":16, "max":4096, "step":16}),
             },
         }
 
@@ -311,10 +818,20 @@ class MosaicTileAssemble:
                  offset_x=0, offset_y=0, gutter=0, overlap_x=0, overlap_y=0,
                  overlap_blend="last", blend_weight=0.5, feather_px=0,
                  export=False, filetype="png", quality=95, basename="mosaic", subfolder="",
-                 bg_color="#000000", bg_alpha=0):
+                 bg_color="#000000", bg_alpha=0, tiff_compression="deflate", tiff_tile=256):
         if torch is None:
             raise RuntimeError("PyTorch requis par ComfyUI n'est pas disponible.")
 
+        fast = self._assemble_torch(tiles, rows, cols, order_mode, offset_x, offset_y, gutter,
+                                    overlap_x, overlap_y, overlap_blend, feather_px, bg_color, bg_alpha)
+        if fast is not None:
+            save_path = ""
+            if export:
+                u8 = _to_uint8(fast)
+                save_path = self._export(u8, rows, cols, filetype, quality, basename, subfolder,
+                                         tiff_compression, tiff_tile)
+            return (fast.unsqueeze(0).cpu(), save_path)
+
         arr = _tensor_batch_to_numpy(tiles)  # (N,H,W,C)
         N, Ht, Wt, C = arr.shape
         expected = rows*cols
@@ -331,7 +848,11 @@ class MosaicTileAssemble:
         canvas_W = offset_x + cols*Wt + max(0, cols-1)*(gutter - overlap_x)
         canvas_H = max(canvas_H, Ht + offset_y); canvas_W = max(canvas_W, Wt + offset_x)
         canvas = _make_canvas(canvas_W, canvas_H, rgba=rgba, bg_rgb=bg_rgb, bg_alpha=bg_alpha)
+        accum = None
+        if overlap_blend in _NORMALIZED_MODES:
+            accum = _WeightAccumulator(canvas_H, canvas_W, C, Ht, Wt, feather_px, _NORMALIZED_MODES[overlap_blend])
 
+        placed = set()
         for i in range(N):
             r, c = _index_to_rowcol(i, rows, cols, order_mode)
             y = offset_y + r*stride_y; x = offset_x + c*stride_x
@@ -345,20 +866,109 @@ class MosaicTileAssemble:
             y1, x1 = min(canvas.shape[0], y+Ht), min(canvas.shape[1], x+Wt)
             if y1<=y0 or x1<=x0: continue
             src = tile[dy:dy+(y1-y0), dx:dx+(x1-x0), :]
+            if accum is not None:
+                accum.add(src, y0, x0, dy, dx)
+                continue
+            if overlap_blend == "multiband":
+                _multiband_place(canvas, src, y0, x0, dy, dx, Ht, Wt, Wt - stride_x, Ht - stride_y,
+                                 _overlap_sides(r, c, placed))
+                placed.add((r, c))
+                continue
             _blend_place(canvas[y0:y1, x0:x1, :], src, 0, 0,
                          mode=overlap_blend, weighted_w=blend_weight, feather_px=feather_px)
+        if accum is not None:
+            accum.resolve(canvas); accum.close()
 
-        pil = Image.fromarray(canvas, mode=("RGBA" if rgba else "RGB"))
         save_path = ""
         if export:
-            root_out = os.path.join("output","tiles"); ts = time.strftime("%Y%m%d-%H%M%S")
-            folder = os.path.join(root_out, subfolder) if subfolder.strip() else root_out
-            os.makedirs(folder, exist_ok=True)
-            fname = f"{basename}_{rows}x{cols}_{canvas.shape[1]}x{canvas.shape[0]}_{ts}.{filetype}"
-            save_path = os.path.join(folder, fname)
+            save_path = self._export(canvas, rows, cols, filetype, quality, basename, subfolder,
+                                     tiff_compression, tiff_tile)
+
+        return (_numpy_to_tensor(canvas), save_path or "")
+
+    def _export(self, arr, rows, cols, filetype, quality, basename, subfolder,
+                tiff_compression="deflate", tiff_tile=256) -> str:
+        root_out = os.path.join("output","tiles"); ts = time.strftime("%Y%m%d-%H%M%S")
+        folder = os.path.join(root_out, subfolder) if subfolder.strip() else root_out
+        os.makedirs(folder, exist_ok=True)
+        fname = f"{basename}_{rows}x{cols}_{arr.shape[1]}x{arr.shape[0]}_{ts}.{filetype}"
+        save_path = os.path.join(folder, fname)
+        if filetype == "tiff":
+            _save_tiff(arr, save_path, compression=tiff_compression, tile=tiff_tile, workers=os.cpu_count() or 4)
+        else:
+            pil = Image.fromarray(arr, mode=("RGBA" if arr.shape[2]==4 else "RGB"))
             _save_pil(pil, save_path, filetype=filetype, quality=quality)
+        return save_path
 
-        return (_numpy_to_tensor(np.array(pil)), save_path or "")
+    def _assemble_torch(self, tiles, rows, cols, order_mode, offset_x, offset_y, gutter,
+                        overlap_x, overlap_y, overlap_blend, feather_px, bg_color, bg_alpha):
+        """Chemin rapide sur tensors (device d'origine, sans aller-retour uint8/numpy).
+        - 'last' sans recouvrement et sans gouttière : reshape + permute ;
+        - 'last' sans recouvrement / modes *_norm : F.fold (somme pondérée / somme des poids).
+        Retourne (H,W,C) float32 ou None si le mode demande la boucle générale."""
+        if tiles is None or tiles.ndim != 4:
+            return None
+        N, Ht, Wt, C = tiles.shape
+        if N != rows*cols:
+            return None
+        stride_x = max(1, Wt + gutter - overlap_x)
+        stride_y = max(1, Ht + gutter - overlap_y)
+        no_overlap = stride_x >= Wt and stride_y >= Ht
+        if not ((overlap_blend == "last" and no_overlap) or overlap_blend in _NORMALIZED_MODES):
+            return None
+
+        if C not in (3,4):
+            return None  # gris / 2 canaux / >4 : la boucle numpy les convertit (_ensure_mode)
+        t = tiles.float().clamp(0, 1)
+        # ordre de placement -> row-major
+        order = [0]*N
+        for i in range(N):
+            r, c = _index_to_rowcol(i, rows, cols, order_mode)
+            order[r*cols + c] = i
+        if order != list(range(N)):
+            t = t[torch.tensor(order, device=t.device)]
+
+        block_H = (rows-1)*stride_y + Ht
+        block_W = (cols-1)*stride_x + Wt
+        covered = None
+        if overlap_blend == "last" and stride_x == Wt and stride_y == Ht:
+            block = t.reshape(rows, cols, Ht, Wt, C).permute(0, 2, 1, 3, 4).reshape(block_H, block_W, C)
+        else:
+            F = torch.nn.functional
+            if overlap_blend in _NORMALIZED_MODES:
+                f = max(0, int(feather_px))
+                w = np.maximum(_feather_mask_cached(Ht, Wt, f, f, _NORMALIZED_MODES[overlap_blend]),
+                               np.float32(_MIN_WEIGHT))
+                w = torch.from_numpy(np.ascontiguousarray(w[..., 0])).to(t.device)
+            else:
+                w = torch.ones((Ht, Wt), dtype=torch.float32, device=t.device)
+            cols_t = (t * w[None, :, :, None]).permute(0, 3, 1, 2).reshape(N, C*Ht*Wt).t().unsqueeze(0)
+            num = F.fold(cols_t, (block_H, block_W), (Ht, Wt), stride=(stride_y, stride_x))[0]
+            w_cols = w.reshape(Ht*Wt, 1).expand(Ht*Wt, N).unsqueeze(0)
+            den = F.fold(w_cols, (block_H, block_W), (Ht, Wt), stride=(stride_y, stride_x))[0, 0]
+            covered = den > 0
+            block = (num / den.clamp_min(1e-12)).permute(1, 2, 0)
+
+        canvas_H = offset_y + rows*Ht + max(0, rows-1)*(gutter - overlap_y)
+        canvas_W = offset_x + cols*Wt + max(0, cols-1)*(gutter - overlap_x)
+        canvas_H = max(canvas_H, Ht + offset_y); canvas_W = max(canvas_W, Wt + offset_x)
+        if covered is None and (offset_x, offset_y) == (0, 0) and (canvas_H, canvas_W) == (block_H, block_W):
+            return block.contiguous()
+
+        bg = list(_parse_hex_color(bg_color)) + ([int(np.clip(bg_alpha, 0, 255))] if C == 4 else [])
+        canvas = torch.tensor(bg, dtype=torch.float32, device=t.device).div_(255.0).expand(canvas_H, canvas_W, C).clone()
+        y0, x0 = max(0, offset_y), max(0, offset_x)
+        y1, x1 = min(canvas_H, offset_y + block_H), min(canvas_W, offset_x + block_W)
+        if y1 > y0 and x1 > x0:
+            by, bx = y0 - offset_y, x0 - offset_x
+            src = block[by:by+(y1-y0), bx:bx+(x1-x0)]
+            dst = canvas[y0:y1, x0:x1]
+            if covered is None:
+                dst.copy_(src)
+            else:
+                m = covered[by:by+(y1-y0), bx:bx+(x1-x0)]
+                dst[m] = src[m]
+        return canvas
 
 # ==== Node 3: Assemble (Folder) avec regex_filename_order ====
 
@@ -392,7 +1002,8 @@ class MosaicAssembleFromFolder:
                 "overlap_y": ("INT", {"default": 0, "min": 0, "max": 4096}),
                 "overlap_blend": ([
                     "last","average","alpha_over","add","multiply","screen","lighten","darken","max","min",
-                    "weighted","feather_linear","feather_cosine"
+                    "weighted","feather_linear","feather_cosine","feather_linear_norm","feather_cosine_norm",
+                    "multiband"
                 ], {"default": "last"}),
                 "blend_weight": ("FLOAT", {"default": 0.5, "min": 0.0, "max": 1.0}),
                 "feather_px": ("INT", {"default": 0, "min": 0, "max": 2048}),
@@ -402,37 +1013,68 @@ class MosaicAssembleFromFolder:
                 "target_h": ("INT", {"default": 0, "min": 0, "max": 8192}),
 
                 "export": ("BOOLEAN", {"default": True}),
-                "filetype": (["png","jpg"], {"default":"png"}),
+                "filetype": (["png","jpg","tiff"], {"default":"png"}),
                 "quality": ("INT", {"default":95, "min":1, "max":100}),
                 "basename": ("STRING", {"default":"mosaic_from_folder"}),
                 "subfolder": ("STRING", {"default":""}),
                 "bg_color": ("STRING", {"default":"#000000"}),
                 "bg_alpha": ("INT", {"default":0, "min":0, "max":255}),
+                "streaming": ("BOOLEAN", {"default": False}),
+                "workers": ("INT", {"default": 4, "min": 1, "max": 64}),
+                "incremental": ("BOOLEAN", {"default": False}),
+                "fast_decode": ("BOOLEAN", {"default": False}),
+                "tiff_compression": (["deflate","none","lzw","zstd"], {"default":"deflate"}),
+                "tiff_tile": ("INT", {"default":256, "min":16, "max":4096, "step":16}),
             },
         }
 
-    RETURN_TYPES = ("IMAGE","STRING",)
-    RETURN_NAMES = ("image","save_path",)
+    # 'stats' ajoutée en 3e position : les liens existants vers image/save_path restent valides
+    RETURN_TYPES = ("IMAGE","STRING","STRING",)
+    RETURN_NAMES = ("image","save_path","stats",)
     FUNCTION = "assemble_from_folder"
     CATEGORY = "DAO_master/Images/Mosaic"
 
     def _collect_files(self, folder: str, pattern: str, sort_mode: str) -> List[str]:
-        folder = folder.strip().strip('"'); search = os.path.join(folder, pattern.strip())
-        files = glob.glob(search)
-        if not files: return []
+        """Un seul passage os.scandir (un stat par fichier, réutilisé par le tri mtime) ;
+        glob n'est utilisé que si la partie dossier du motif contient des jokers."""
+        folder = folder.strip().strip('"'); pattern = pattern.strip()
+        sub, name_pat = os.path.split(pattern)
+        entries: List[Tuple[str, str, float]] = []  # (chemin, nom, mtime)
+        if glob.has_magic(sub):
+            for p in glob.glob(os.path.join(folder, pattern)):
+                if os.path.isfile(p):
+                    entries.append((p, os.path.basename(p), os.stat(p).st_mtime))
+        else:
+            base = os.path.join(folder, sub) if sub else (folder or ".")
+            show_hidden = name_pat.startswith(".")
+            try:
+                with os.scandir(base) as it:
+                    for e in it:
+                        if (not show_hidden and e.name.startswith(".")) or not fnmatch.fnmatch(e.name, name_pat):
+                            continue
+                        if e.is_file():
+                            entries.append((os.path.join(folder, sub, e.name) if sub else os.path.join(folder, e.name),
+                                            e.name, e.stat().st_mtime))
+            except OSError:
+                return []
+        if not entries: return []
         if sort_mode == "name_asc":
-            files.sort(key=lambda p: os.path.basename(p).lower())
+            entries.sort(key=lambda t: t[1].lower())
         elif sort_mode == "name_desc":
-            files.sort(key=lambda p: os.path.basename(p).lower(), reverse=True)
+            entries.sort(key=lambda t: t[1].lower(), reverse=True)
         elif sort_mode == "mtime_asc":
-            files.sort(key=lambda p: os.path.getmtime(p))
+            entries.sort(key=lambda t: t[2])
         elif sort_mode == "mtime_desc":
-            files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-        return files
+            entries.sort(key=lambda t: t[2], reverse=True)
+        return [t[0] for t in entries]
 
-    def _regex_map(self, files: List[str], rows: int, cols: int, regex_row: str, regex_col: str, base_index: int) -> Dict[Tuple[int,int], str]:
+    def _regex_map(self, files: List[str], rows: int, cols: int, regex_row: str, regex_col: str,
+                   base_index: int) -> Tuple[Dict[Tuple[int,int], str], Dict[Tuple[int,int], List[str]]]:
+        """Index (row, col) -> fichier en un passage ; le premier fichier d'une case gagne,
+        les suivants sont rapportés comme doublons."""
         rx_r = re.compile(regex_row); rx_c = re.compile(regex_col)
         placed: Dict[Tuple[int,int], str] = {}
+        duplicates: Dict[Tuple[int,int], List[str]] = {}
         for p in files:
             name = os.path.basename(p)
             mr = rx_r.search(name); mc = rx_c.search(name)
@@ -442,9 +1084,153 @@ class MosaicAssembleFromFolder:
                 c = int(mc.group(1)) - base_index
             except Exception:
                 continue
-            if 0 <= r < rows and 0 <= c < cols and (r,c) not in placed:
-                placed[(r,c)] = p
-        return placed
+            if 0 <= r < rows and 0 <= c < cols:
+                if (r,c) not in placed:
+                    placed[(r,c)] = p
+                else:
+                    duplicates.setdefault((r,c), []).append(p)
+        return placed, duplicates
+
+    def _resolve_mapping(self, files: List[str], rows: int, cols: int, order_mode: str,
+                         regex_row: str, regex_col: str, base_index: int,
+                         fallback_order: str) -> Tuple[Dict[Tuple[int,int], str], str]:
+        """Retourne (mapping, rapport) ; le rapport liste les cases manquantes/en double (mode regex)."""
+        expected = rows*cols
+        if order_mode == "regex_filename_order":
+            mapping, duplicates = self._regex_map(files, rows, cols, regex_row, regex_col, base_index)
+            # Compléter les cases manquantes avec l'ordre fallback (ensemble : test O(1))
+            used = set(mapping.values())
+            remaining = iter([f for f in files if f not in used])
+            missing = []
+            for i in range(expected):
+                r, c = _index_to_rowcol(i, rows, cols, fallback_order)
+                if (r,c) not in mapping:
+                    missing.append((r,c))
+                    nxt = next(remaining, None)
+                    if nxt is not None:
+                        mapping[(r,c)] = nxt
+            report = []
+            if missing:
+                cells = ", ".join(f"r{r}c{c}" for r, c in missing[:8]) + (" ..." if len(missing) > 8 else "")
+                report.append(f"{len(missing)} case(s) sans correspondance regex, complétée(s) en {fallback_order} : {cells}")
+            if duplicates:
+                n_dup = sum(len(v) for v in duplicates.values())
+                cells = ", ".join(f"r{r}c{c}" for r, c in list(duplicates)[:8]) + (" ..." if len(duplicates) > 8 else "")
+                report.append(f"{n_dup} doublon(s) ignoré(s) : {cells}")
+            return mapping, " ; ".join(report)
+        # ordre standard à partir de files[:expected]
+        mapping = {}
+        for i in range(expected):
+            r, c = _index_to_rowcol(i, rows, cols, order_mode)
+            mapping[(r,c)] = files[i]
+        return mapping, ""
+
+    def _load_tile(self, path: str, target_w: int, target_h: int, enforce_tile_size: bool, rgba: bool,
+                   box: Tuple[int,int,int,int] = None, fast: bool = False) -> np.ndarray:
+        """Charge la fenêtre `box` (x0,y0,x1,y1, coordonnées de la tuile normalisée) ou la tuile entière.
+        `fast` : rééchantillonnage de la seule fenêtre (écart possible d'1 niveau avec le
+        redimensionnement complet). Pas de draft JPEG : le décodage DCT réduit s'écarte de
+        dizaines de niveaux sur les tuiles texturées, même avec une marge 2x."""
+        with Image.open(path) as im:
+            resize = enforce_tile_size and (im.width != target_w or im.height != target_h)
+            tw, th = (target_w, target_h) if resize else im.size
+            x0, y0, x1, y1 = box or (0, 0, tw, th)
+            x1, y1 = min(x1, tw), min(y1, th)
+            if im.mode not in ("RGB","RGBA"):
+                im = im.convert("RGBA" if im.mode=="LA" else "RGB")
+            if resize:
+                if fast:
+                    sx, sy = im.width / tw, im.height / th
+                    im = im.resize((x1-x0, y1-y0), Image.Resampling.LANCZOS,
+                                   box=(x0*sx, y0*sy, x1*sx, y1*sy))
+                else:
+                    im = im.resize((tw, th), Image.Resampling.LANCZOS).crop((x0, y0, x1, y1))
+            elif (x0, y0, x1, y1) != (0, 0, tw, th):
+                im = im.crop((x0, y0, x1, y1))
+            return np.asarray(im.convert("RGBA" if rgba else "RGB"), dtype=np.uint8)
+
+    def _file_entry(self, path: str, prev: Dict = None) -> Dict:
+        """Entrée de manifest ; le hash n'est recalculé que si (chemin, mtime, taille) a changé."""
+        st = os.stat(path)
+        entry = {"path": os.path.abspath(path), "mtime": st.st_mtime, "size": st.st_size}
+        if prev and all(prev.get(k) == entry[k] for k in ("path", "mtime", "size")) and prev.get("hash"):
+            entry["hash"] = prev["hash"]
+        else:
+            h = hashlib.sha1()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            entry["hash"] = h.hexdigest()
+        return entry
+
+    def _read_manifest(self, path: str) -> Dict:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _place_tiles(self, canvas, jobs, load, *, tile_h, tile_w, stride_x, stride_y,
+                     overlap_blend, blend_weight, feather_px, workers=1, streaming=False,
+                     acc_dir=None, region=None, on_row: Callable[[int], None] = None) -> None:
+        """Place `jobs` dans `canvas` (décodage parallèle, placement dans l'ordre).
+        `region` (y0,y1,x0,x1) limite l'écriture à un rectangle : les poids de fondu restent
+        ceux de la tuile entière, le résultat est identique à un placement complet.
+        `load(job, box)` ne décode que la fenêtre réellement écrite de chaque tuile.
+        `on_row(y)` est appelé à chaque nouvelle rangée : les lignes du canvas au-dessus de `y`
+        sont alors définitives (hors modes normalisés, résolus à la fin)."""
+        ry0, ry1, rx0, rx1 = region or (0, canvas.shape[0], 0, canvas.shape[1])
+        accum = None
+        if overlap_blend in _NORMALIZED_MODES:
+            accum = _WeightAccumulator(ry1-ry0, rx1-rx0, canvas.shape[2], tile_h, tile_w, feather_px,
+                                       _NORMALIZED_MODES[overlap_blend], directory=acc_dir)
+        f = max(0, int(feather_px))
+        fk = "cosine" if overlap_blend.endswith("cosine") else "linear"
+        keys = {(j[0], j[1]) for j in jobs}
+        work = []
+        for job in jobs:
+            r, c, y0, y1, x0, x1, dy, dx = job
+            cy0, cy1, cx0, cx1 = max(y0, ry0), min(y1, ry1), max(x0, rx0), min(x1, rx1)
+            if overlap_blend == "last":
+                # les voisines droite/bas, placées après, écrasent le recouvrement : inutile de le décoder
+                if (r, c+1) in keys: cx1 = min(cx1, x0 - dx + stride_x)
+                if (r+1, c) in keys: cy1 = min(cy1, y0 - dy + stride_y)
+            if cy1<=cy0 or cx1<=cx0: continue
+            ty, tx = dy+cy0-y0, dx+cx0-x0  # origine de la fenêtre dans la tuile
+            work.append((job, (cy0, cy1, cx0, cx1), (tx, ty, tx+cx1-cx0, ty+cy1-cy0)))
+
+        def load_window(item):
+            return load(item[0], item[2])
+        try:
+            last_row = None
+            placed = set()
+            for (job, win, box), sub in zip(work, _ordered_prefetch(load_window, work, workers=int(workers))):
+                r, c, y0, y1, x0, x1, dy, dx = job
+                cy0, cy1, cx0, cx1 = win
+                if last_row is not None and r != last_row:
+                    if streaming:
+                        canvas.flush()
+                    if on_row is not None and accum is None:
+                        on_row(y0)
+                last_row = r
+                if accum is not None:
+                    accum.add(sub, cy0-ry0, cx0-rx0, box[1], box[0])
+                    continue
+                if overlap_blend == "multiband":
+                    _multiband_place(canvas, sub, y0, x0, dy, dx, tile_h, tile_w,
+                                     tile_w - stride_x, tile_h - stride_y, _overlap_sides(r, c, placed))
+                    placed.add((r, c))
+                    continue
+                mask = None
+                if region is not None and overlap_blend in ("feather_linear","feather_cosine"):
+                    mask = _feather_mask_cached(y1-y0, x1-x0, f, f, fk)[cy0-y0:cy1-y0, cx0-x0:cx1-x0]
+                _blend_place(canvas[cy0:cy1, cx0:cx1, :], sub, 0, 0, mode=overlap_blend,
+                             weighted_w=blend_weight, feather_px=feather_px, mask=mask)
+            if accum is not None:
+                accum.resolve(canvas[ry0:ry1, rx0:rx1])
+        finally:
+            if accum is not None:
+                accum.close()
 
     def assemble_from_folder(self, folder, glob_pattern, rows, cols,
                              sort_mode="name_asc",
@@ -454,7 +1240,8 @@ class MosaicAssembleFromFolder:
                              overlap_blend="last", blend_weight=0.5, feather_px=0,
                              enforce_tile_size=True, target_w=0, target_h=0,
                              export=True, filetype="png", quality=95, basename="mosaic_from_folder", subfolder="",
-                             bg_color="#000000", bg_alpha=0):
+                             bg_color="#000000", bg_alpha=0, streaming=False, workers=4, incremental=False,
+                             fast_decode=False, tiff_compression="deflate", tiff_tile=256):
         if torch is None:
             raise RuntimeError("PyTorch requis par ComfyUI n'est pas disponible.")
 
@@ -464,46 +1251,24 @@ class MosaicAssembleFromFolder:
             raise ValueError(f"Pas assez d'images ({len(files)}) pour {rows}x{cols} ({expected}).")
 
         # Détermine l'ordre/mapping
-        use_regex = (order_mode == "regex_filename_order")
-        mapping: Dict[Tuple[int,int], str] = {}
-        if use_regex:
-            mapping = self._regex_map(files, rows, cols, regex_row, regex_col, base_index)
-            # Compléter les cases manquantes avec l'ordre fallback
-            remaining = [f for f in files if f not in mapping.values()]
-            idx_rem = 0
-            for i in range(expected):
-                r, c = _index_to_rowcol(i, rows, cols, fallback_order)
-                if (r,c) not in mapping and idx_rem < len(remaining):
-                    mapping[(r,c)] = remaining[idx_rem]; idx_rem += 1
-        else:
-            # ordre standard à partir de files[:expected]
-            mapping = {}
-            for i in range(expected):
-                r, c = _index_to_rowcol(i, rows, cols, order_mode)
-                mapping[(r,c)] = files[i]
+        mapping, report = self._resolve_mapping(files, rows, cols, order_mode,
+                                                regex_row, regex_col, base_index, fallback_order)
 
-        # Charge les images selon mapping (row-major de placement)
-        imgs = []
+        # Lecture des en-têtes seulement (mode + taille), les pixels sont décodés au placement
+        modes = []
         for r in range(rows):
             for c in range(cols):
-                p = mapping[(r,c)]
-                im = Image.open(p)
-                if im.mode not in ("RGB","RGBA"):
-                    im = im.convert("RGBA" if im.mode=="LA" else "RGB")
-                imgs.append(im)
+                with Image.open(mapping[(r,c)]) as im:
+                    modes.append(im.mode)
+                    if r == 0 and c == 0:
+                        first_w, first_h = im.width, im.height
 
         # Normalisation taille
         if target_w <= 0 or target_h <= 0:
-            target_w = imgs[0].width if target_w <= 0 else target_w
-            target_h = imgs[0].height if target_h <= 0 else target_h
-        norm = []
-        for im in imgs:
-            if enforce_tile_size and (im.width != target_w or im.height != target_h):
-                im = im.resize((target_w, target_h), Image.Resampling.LANCZOS)
-            norm.append(im)
-
-        C = 4 if any(im.mode=="RGBA" for im in norm) else 3
-        rgba = (C==4)
+            target_w = first_w if target_w <= 0 else target_w
+            target_h = first_h if target_h <= 0 else target_h
+
+        rgba = any(m in ("RGBA","LA") for m in modes)
         bg_rgb = _parse_hex_color(bg_color)
         Ht, Wt = target_h, target_w
         stride_x = max(1, Wt + gutter - overlap_x)
@@ -511,30 +1276,148 @@ class MosaicAssembleFromFolder:
         canvas_H = offset_y + rows*Ht + max(0, rows-1)*(gutter - overlap_y)
         canvas_W = offset_x + cols*Wt + max(0, cols-1)*(gutter - overlap_x)
         canvas_H = max(canvas_H, Ht + offset_y); canvas_W = max(canvas_W, Wt + offset_x)
-        canvas = _make_canvas(canvas_W, canvas_H, rgba=rgba, bg_rgb=bg_rgb, bg_alpha=bg_alpha)
+        C = 4 if rgba else 3
 
-        # Placement
-        for i, im in enumerate(norm):
-            r, c = i // cols, i % cols  # on place selon row-major des images listées
-            y = offset_y + r*stride_y; x = offset_x + c*stride_x
-            src = np.array(im.convert("RGBA" if rgba else "RGB"), dtype=np.uint8)
+        # Cases visibles (crop si hors-champ via offset), row-major de placement
+        jobs = []
+        for r in range(rows):
+            for c in range(cols):
+                y = offset_y + r*stride_y; x = offset_x + c*stride_x
+                y0, x0 = max(0,y), max(0,x); dy, dx = y0-y, x0-x
+                y1, x1 = min(canvas_H, y+Ht), min(canvas_W, x+Wt)
+                if y1<=y0 or x1<=x0: continue
+                jobs.append((r, c, y0, y1, x0, x1, dy, dx))
 
-            # crop si hors-champ via offset
-            y0, x0 = max(0,y), max(0,x); dy, dx = y0-y, x0-x
-            y1, x1 = min(canvas.shape[0], y+Ht), min(canvas.shape[1], x+Wt)
-            if y1<=y0 or x1<=x0: continue
-            src = src[dy:dy+(y1-y0), dx:dx+(x1-x0), :]
-            _blend_place(canvas[y0:y1, x0:x1, :], src, 0, 0,
-                         mode=overlap_blend, weighted_w=blend_weight, feather_px=feather_px)
+        root_out = os.path.join("output","tiles"); ts = time.strftime("%Y%m%d-%H%M%S")
+        folder_out = os.path.join(root_out, subfolder) if subfolder.strip() else root_out
 
-        pil = Image.fromarray(canvas, mode=("RGBA" if rgba else "RGB"))
-        save_path = ""
-        if export:
-            root_out = os.path.join("output","tiles"); ts = time.strftime("%Y%m%d-%H%M%S")
-            folder_out = os.path.join(root_out, subfolder) if subfolder.strip() else root_out
-            os.makedirs(folder_out, exist_ok=True)
-            fname = f"{basename}_{rows}x{cols}_{canvas.shape[1]}x{canvas.shape[0]}_{ts}.{filetype}"
-            save_path = os.path.join(folder_out, fname)
-            _save_pil(pil, save_path, filetype=filetype, quality=quality)
+        # Manifest + canvas en cache (.npy) pour la ré-assemblage incrémental ; un cache par dossier
+        # source (chemin résolu) : deux dossiers de même basename/rows/cols ne partagent pas le manifest
+        src = os.path.realpath(folder)
+        src_id = hashlib.sha1(src.encode("utf-8")).hexdigest()[:8]
+        cache_dir = os.path.join(folder_out, f"{basename}_{rows}x{cols}_{src_id}.mosaic")
+        manifest_path = os.path.join(cache_dir, "manifest.json")
+        canvas_cache = os.path.join(cache_dir, "canvas.npy")
+        key = hashlib.sha1(json.dumps([
+            src, canvas_H, canvas_W, C, Ht, Wt, stride_x, stride_y, offset_x, offset_y, enforce_tile_size,
+            overlap_blend, float(blend_weight), int(feather_px), list(bg_rgb), int(bg_alpha), bool(fast_decode),
+        ]).encode("utf-8")).hexdigest()
+        manifest = self._read_manifest(manifest_path) if incremental else None
+        prev = {}
+        if manifest and manifest.get("key") == key:
+            prev = {(t["r"], t["c"]): t for t in manifest.get("tiles", [])}
+        entries = {}
+        if incremental:
+            entries = {(r,c): self._file_entry(mapping[(r,c)], prev.get((r,c))) for r in range(rows) for c in range(cols)}
+
+        canvas = None
+        dirty = None  # None = assemblage complet
+        if prev and overlap_blend != "multiband" and os.path.isfile(canvas_cache):
+            try:
+                canvas = np.load(canvas_cache, mmap_mode="r+")
+            except (OSError, ValueError):
+                canvas = None
+            if canvas is not None and canvas.shape == (canvas_H, canvas_W, C):
+                dirty = [j for j in jobs if prev.get((j[0],j[1]), {}).get("hash") != entries[(j[0],j[1])]["hash"]]
+            else:
+                canvas = None
+        n_dirty = None if dirty is None else len(dirty)
+        if dirty is not None:
+            # chaque tuile modifiée redécode et replace ses voisines : au-delà d'une fraction de tuiles
+            # modifiées, ou si ce travail dépasse un assemblage complet, on repart d'un canvas neuf
+            nears = [[j for j in jobs if j[2] < d[3] and d[2] < j[3] and j[4] < d[5] and d[4] < j[5]]
+                     for d in dirty]
+            if len(dirty) > _INCREMENTAL_MAX_DIRTY * len(jobs) or sum(map(len, nears)) >= len(jobs):
+                del canvas
+                canvas, dirty = None, None
+
+        tmp_path = None
+        if canvas is None:
+            if incremental:
+                os.makedirs(cache_dir, exist_ok=True)
+                canvas, _ = _make_memmap_canvas(canvas_W, canvas_H, rgba=rgba, bg_rgb=bg_rgb,
+                                                bg_alpha=bg_alpha, path=canvas_cache)
+            elif streaming:
+                # canvas disque : seule la tuile en cours est en RAM
+                os.makedirs(folder_out, exist_ok=True)
+                canvas, tmp_path = _make_memmap_canvas(canvas_W, canvas_H, rgba=rgba, bg_rgb=bg_rgb,
+                                                       bg_alpha=bg_alpha, directory=folder_out)
+            else:
+                canvas = _make_canvas(canvas_W, canvas_H, rgba=rgba, bg_rgb=bg_rgb, bg_alpha=bg_alpha)
+
+        tiff = None
+        try:
+            # Décodage/normalisation en parallèle, placement séquentiel dans l'ordre
+            def load(job, box):
+                return self._load_tile(mapping[(job[0],job[1])], Wt, Ht, enforce_tile_size, rgba,
+                                       box=box, fast=fast_decode)
+            place = dict(tile_h=Ht, tile_w=Wt, stride_x=stride_x, stride_y=stride_y,
+                         overlap_blend=overlap_blend, blend_weight=blend_weight, feather_px=feather_px,
+                         workers=workers, streaming=isinstance(canvas, np.memmap),
+                         acc_dir=folder_out if (streaming or incremental) else None)
+            fname = f"{basename}_{rows}x{cols}_{canvas_W}x{canvas_H}_{ts}.{filetype}"
+            if export and filetype == "tiff":
+                # TIFF tuilé écrit pendant le placement, rangée par rangée
+                os.makedirs(folder_out, exist_ok=True)
+                tiff = _TiledTiffWriter(os.path.join(folder_out, fname), canvas_W, canvas_H, C,
+                                        tile=tiff_tile, compression=tiff_compression, workers=workers)
+                def rows_done(y):
+                    tiff.write_until(canvas, y)
+                if dirty is None:
+                    place["on_row"] = rows_done
+            t0 = time.perf_counter()
+            if dirty is None:
+                self._place_tiles(canvas, jobs, load, **place)
+                n_done = len(jobs)
+            else:
+                # Ne recalcule que le rectangle de chaque tuile modifiée, avec ses voisines qui le recouvrent
+                fill = _bg_fill(rgba, bg_rgb, bg_alpha)
+                n_done = 0
+                for d, near in zip(dirty, nears):
+                    region = (d[2], d[3], d[4], d[5])
+                    canvas[region[0]:region[1], region[2]:region[3]] = fill
+                    self._place_tiles(canvas, near, load, region=region, **place)
+                    n_done += len(near)
+            if isinstance(canvas, np.memmap):
+                canvas.flush()
+            dt = time.perf_counter() - t0
+            stats = f"{n_done} tuiles en {dt:.2f}s ({n_done/max(dt,1e-9):.1f} tiles/s, workers={int(workers)})"
+            if n_dirty is not None:
+                stats += f" ; incrémental : {n_dirty}/{len(jobs)} tuiles modifiées"
+                if dirty is None:
+                    stats += " -> ré-assemblage complet"
+            if report:
+                stats += "\n" + report
+
+            if incremental:
+                placement = {(j[0],j[1]): list(j[2:]) for j in jobs}
+                tiles_m = [dict(entries[(r,c)], r=r, c=c, placement=placement.get((r,c)))
+                           for r in range(rows) for c in range(cols)]
+                with open(manifest_path, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, "rows": rows, "cols": cols, "canvas": [canvas_H, canvas_W, C],
+                               "tiles": tiles_m}, f, indent=1)
+
+            save_path = ""
+            if export:
+                os.makedirs(folder_out, exist_ok=True)
+                save_path = os.path.join(folder_out, fname)
+                if tiff is not None:
+                    tiff.close(canvas)
+                elif streaming and filetype == "png":
+                    _save_png_strips(canvas, save_path)
+                else:
+                    pil = Image.fromarray(np.asarray(canvas), mode=("RGBA" if rgba else "RGB"))
+                    _save_pil(pil, save_path, filetype=filetype, quality=quality)
 
-        return (_numpy_to_tensor(np.array(pil)), save_path or "")
+            # En streaming, la sortie IMAGE est un aperçu réduit (le plein format est sur disque)
+            out = _strided_preview(canvas) if streaming else canvas
+            return (_numpy_to_tensor(out), save_path or "", stats)
+        finally:
+            if tiff is not None:
+                tiff.abort()
+            if tmp_path is not None:
+                del canvas
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
@@ -6,14 +6,18 @@ from PIL import Image, PngImagePlugin, ExifTags
 import numpy as np
 import torch
 
+from .image_utils import _uint8_to_tensor
+
 def _to_image_tensor(arr: np.ndarray) -> torch.Tensor:
     """
     arr: H x W x C (uint8 or float) -> 1 x H x W x C (float32 0..1)
     """
-    if arr.dtype != np.float32:
-        arr = arr.astype(np.float32) / 255.0
     if arr.ndim != 3:
         raise ValueError("Expected HxWxC array for IMAGE")
+    if arr.dtype == np.uint8:
+        return _uint8_to_tensor(arr).unsqueeze(0)
+    if arr.dtype != np.float32:
+        arr = arr.astype(np.float32) / 255.0
     return torch.from_numpy(np.ascontiguousarray(arr)).unsqueeze(0)
 
 def _to_mask_tensor(alpha: np.ndarray | None, hw: Tuple[int,int]) -> torch.Tensor:
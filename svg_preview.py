@@ -1,8 +1,10 @@
 # ComfyUI_DXF/svg_preview.py
 # (imports inchangés)
-import torch, numpy as np, io
+import io
 from PIL import Image
 from lxml import etree
+
+from .image_utils import _pil_to_image
 try:
     import cairosvg
     _CAIRO_OK = True
@@ -30,8 +32,7 @@ class SvgPreview:
     def preview(self, svg_text, width, height, fit_mode, bg_enabled, bg_color_hex):
         if not svg_text.strip():
             img = Image.new('RGB' if bg_enabled else 'RGBA', (width, height), bg_color_hex if bg_enabled else (0,0,0,0))
-            img_np = np.array(img).astype(np.float32) / 255.0
-            return (torch.from_numpy(img_np)[None,],)
+            return (_pil_to_image(img),)
 
         # Calculer les dimensions de rendu basées sur le fit_mode
         render_w, render_h = width, height
@@ -73,10 +74,6 @@ class SvgPreview:
             final_img = rendered_img
 
         # Conversion en tenseur
-        if final_img.mode == 'RGB':
-            img_np = np.array(final_img).astype(np.float32) / 255.0
-        else: # RGBA
-            img_np = np.array(final_img.convert("RGBA")).astype(np.float32) / 255.0
-            
-        tensor = torch.from_numpy(img_np)[None,]
-        return (tensor,)
\ No newline at end of file
+        if final_img.mode != 'RGB': # RGBA
+            final_img = final_img.convert("RGBA")
+        return (_pil_to_image(final_img),)
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""Chargement des modules du pack pour pytest : même paquet synthétique que benchmarks/
+(imports relatifs résolus, __init__.py non exécuté car il a besoin du serveur ComfyUI)."""
+import os, sys, importlib, importlib.machinery, importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_module(name: str):
+    pkg = "dao_master_tests"
+    if pkg not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(pkg, None, is_package=True)
+        spec.submodule_search_locations = [ROOT]
+        sys.modules[pkg] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{pkg}.{name}")
+
+
+@pytest.fixture(scope="session")
+def mosaic():
+    return _load_module("mosaic_nodes")
+
+
+@pytest.fixture(scope="session")
+def dao_move():
+    return _load_module("dao_move")
+
+
+@pytest.fixture(scope="session")
+def image_utils():
+    return _load_module("image_utils")
+
+
+@pytest.fixture(scope="session")
+def clone_utils():
+    return _load_module("clone_utils")
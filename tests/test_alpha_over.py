@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+
+def _alpha_over_float(dst, src):
+    # référence float32 : Co = Cs + Cd*(1-As), Ao = As + Ad*(1-As) (couleur source prémultipliée)
+    Cd = dst[..., :3].astype(np.float32)
+    Ad = dst[..., 3:4].astype(np.float32) / 255.0 if dst.shape[2] == 4 else np.ones(dst.shape[:2] + (1,), np.float32)
+    Cs = src[..., :3].astype(np.float32)
+    As = src[..., 3:4].astype(np.float32) / 255.0 if src.shape[2] == 4 else np.ones(src.shape[:2] + (1,), np.float32)
+    out = np.clip(Cs + Cd * (1.0 - As), 0, 255)
+    if dst.shape[2] == 4:
+        out = np.concatenate([out, np.clip((As + Ad * (1.0 - As)) * 255.0, 0, 255)], axis=2)
+    return out.astype(np.uint8)
+
+
+def _check(mosaic, dst, src):
+    got = dst.copy()
+    mosaic._alpha_over_u16(got, src)
+    ref = _alpha_over_float(dst, src)
+    assert got.shape == ref.shape
+    assert np.abs(ref.astype(np.int16) - got).max() <= 1
+
+
+def test_alpha_over_u16_sampled_triplets(mosaic):
+    # grille (Cs, Cd, As) échantillonnée, bornes 0/255 comprises
+    v = np.unique(np.r_[0:256:7, 1, 127, 128, 254, 255]).astype(np.uint8)
+    cs, cd, a = (g.ravel() for g in np.meshgrid(v, v, v, indexing="ij"))
+    src = np.stack([cs, cs, cs, a], axis=-1)[None]
+    dst = np.stack([cd, cd, cd, cd], axis=-1)[None]
+    _check(mosaic, dst, src)
+
+
+@pytest.mark.parametrize("cd, cs", [(4, 4), (3, 4), (4, 3), (3, 3)])
+def test_alpha_over_u16_channel_combos(mosaic, cd, cs):
+    rng = np.random.default_rng(cd * 10 + cs)
+    dst = rng.integers(0, 256, (64, 96, cd), dtype=np.uint8)
+    src = rng.integers(0, 256, (64, 96, cs), dtype=np.uint8)
+    _check(mosaic, dst, src)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def _sprite(size, seed):
+    rng = np.random.default_rng(seed)
+    spr = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    spr[..., 3][rng.random((size, size)) < 0.25] = 0
+    return spr
+
+
+def _reference(size, sprites, xs, ys, ids):
+    """Un alpha_composite par clone, union des alphas : comportement attendu du moteur."""
+    W, H = size
+    base, mask = Image.new("RGBA", (W, H)), np.zeros((H, W), np.uint8)
+    for k, x, y in zip(ids, xs, ys):
+        spr = sprites[k]
+        h, w = spr.shape[:2]
+        x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + w, W), min(y + h, H)
+        if x0 < x1 and y0 < y1:
+            base.alpha_composite(Image.fromarray(spr, "RGBA"), (x0, y0), (x0 - x, y0 - y, w, h))
+            np.maximum(mask[y0:y1, x0:x1], spr[y0 - y:y1 - y, x0 - x:x1 - x, 3], out=mask[y0:y1, x0:x1])
+    return np.asarray(base), mask
+
+
+@pytest.mark.parametrize("layout", ["grid", "grid_overlap", "ring", "random"])
+def test_stamp_sprites_matches_loop(clone_utils, layout):
+    cu = clone_utils
+    size = (400, 300)
+    sprites = [_sprite(s, i) for i, s in enumerate((3, 17, 40))]
+    if layout.startswith("grid"):
+        step = 20 if layout == "grid" else 12
+        xs, ys = cu._grid_positions(22, 16, step, step, -5, -5, step // 2, 0)
+        ids = np.arange(len(xs)) % 2
+    elif layout == "ring":
+        ids = np.arange(500) % 3
+        xs, ys = cu._ring_positions(500, 120.0, 10.0, 200.0, 150.0, 40, 40)
+    else:
+        rng = np.random.default_rng(3)
+        xs, ys, ids = rng.integers(-40, 400, 800), rng.integers(-40, 300, 800), rng.integers(0, 3, 800)
+    base, mask = Image.new("RGBA", size), np.zeros((size[1], size[0]), np.uint8)
+    cu._stamp_sprites(base, sprites, xs, ys, ids, mask=mask)
+    ref_img, ref_mask = _reference(size, sprites, xs.tolist(), ys.tolist(), ids.tolist())
+    np.testing.assert_array_equal(np.asarray(base), ref_img)
+    np.testing.assert_array_equal(mask, ref_mask)
@@ -0,0 +1,21 @@
+import pytest
+import torch
+
+
+def _apply(node, image, tile_size, **kw):
+    args = dict(angle_deg=0.0, scale=1.0, dx=0, dy=0, pivot_mode="center", pivot_x=0.0, pivot_y=0.0,
+                flip_h=False, flip_v=False, apply_mask_to_alpha=True, invert_mask=False)
+    args.update(kw)
+    return node.apply(image, tile_size=tile_size, **args)
+
+
+@pytest.mark.parametrize("angle, scale, dx", [(90.0, 0.5, 100), (90.0, 1.0, 0), (180.0, 1.0, -37), (33.3, 1.7, 13)])
+def test_tiled_matches_untiled(dao_move, angle, scale, dx):
+    # coordonnées source exactes (coefficients dyadiques) : le rendu par tuiles est identique
+    torch.manual_seed(0)
+    image = torch.rand(1, 301, 413, 4)
+    node = dao_move.DAOMove()
+    ref = _apply(node, image, 0, angle_deg=angle, scale=scale, dx=dx)
+    tiled = _apply(node, image, 64, angle_deg=angle, scale=scale, dx=dx)
+    for a, b in zip(ref, tiled):
+        assert torch.equal(a, b)
@@ -0,0 +1,18 @@
+import pytest
+from PIL import Image
+
+
+@pytest.mark.parametrize("src, mode, channels", [
+    ("LA", None, 4), ("LA", "RGB", 3), ("L", None, 3), ("P", None, 3),
+    ("RGBA", None, 4), ("RGBA", "RGB", 3), ("RGB", "RGBA", 4),
+])
+def test_pil_to_image_channels(image_utils, src, mode, channels):
+    img = Image.new(src, (5, 3))
+    assert tuple(image_utils._pil_to_image(img, mode=mode).shape) == (1, 3, 5, channels)
+
+
+def test_pil_to_image_roundtrip(image_utils):
+    import numpy as np
+    arr = np.arange(4 * 6 * 4, dtype=np.uint8).reshape(4, 6, 4)
+    img = Image.fromarray(arr, "RGBA")
+    assert np.array_equal(np.asarray(image_utils._image_to_pil(image_utils._pil_to_image(img))), arr)
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+
+def _noise(h, w, c=3, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (h, w, c), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("blend", ["feather_linear_norm", "feather_cosine_norm"])
+@pytest.mark.parametrize("overlap", [0, 32])
+def test_run_tiled_norm_identity(mosaic, blend, overlap):
+    # callback identité : la moyenne normalisée des recouvrements doit rendre l'image d'entrée
+    img = _noise(300, 500)
+    out = mosaic._run_tiled(img, lambda t, y0, x0: t, 128, 128, overlap=overlap, blend=blend)
+    np.testing.assert_array_equal(out, img)
+
+
+@pytest.mark.parametrize("target", [256, 700, 100])
+def test_load_tile_fast_decode_jpeg(mosaic, tmp_path, target):
+    # tuile JPEG texturée redimensionnée : fast_decode reste à 1 niveau du chemin par défaut
+    from PIL import Image
+    path = str(tmp_path / "tile.jpg")
+    Image.fromarray(_noise(512, 512)).save(path, quality=92)
+    node = mosaic.MosaicAssembleFromFolder()
+    half = target // 2
+    for box in (None, (0, 0, target, target), (half // 2, 3, target - 5, half)):
+        ref = node._load_tile(path, target, target, True, False, box=box, fast=False).astype(np.int16)
+        fast = node._load_tile(path, target, target, True, False, box=box, fast=True).astype(np.int16)
+        assert ref.shape == fast.shape
+        assert np.abs(ref - fast).max() <= 1
+
+
+def test_tiff_bigtiff_decision_uses_padded_tiles(mosaic):
+    # 37000x37000x3 brut < 4 Go, mais tuiles de bord pleines (4096 px) : 40960^2*3 > 4 Go
+    assert 37000 * 37000 * 3 < 2**32
+    assert mosaic._tiff_needs_big(37000, 37000, 3, 4096, "none")
+    assert not mosaic._tiff_needs_big(4096, 4096, 4, 256, "deflate")
+
+
+def test_tiled_tiff_roundtrip(mosaic, tmp_path):
+    from PIL import Image
+    img = _noise(70, 90, 4)
+    for comp in ("none", "deflate"):
+        path = str(tmp_path / f"t_{comp}.tif")
+        mosaic._save_tiff(img, path, compression=comp, tile=32, workers=2)
+        with Image.open(path) as im:
+            np.testing.assert_array_equal(np.asarray(im), img)
+
+
+@pytest.mark.parametrize("blend, overlap", [("last", 0), ("feather_linear_norm", 8)])
+def test_assemble_grayscale_batch(mosaic, blend, overlap):
+    # batch [N,H,W,1] : même résultat que le batch répété en RGB
+    import torch
+    torch.manual_seed(0)
+    gray = torch.rand(6, 32, 40, 1)
+    node = mosaic.MosaicTileAssemble()
+    kw = dict(overlap_x=overlap, overlap_y=overlap, overlap_blend=blend, feather_px=overlap)
+    out = node.assemble(gray, 2, 3, **kw)[0]
+    ref = node.assemble(gray.repeat(1, 1, 1, 3), 2, 3, **kw)[0]
+    assert out.shape == ref.shape and out.shape[-1] == 3
+    assert (out - ref).abs().max().item() <= 1.0 / 255 + 1e-6
+
+
+@pytest.mark.parametrize("layout", ["dzi", "xyz"])
+def test_pyramid_levels(mosaic, tmp_path, layout):
+    import json, os
+    img = _noise(300, 700)
+    with open(mosaic._write_pyramid(img, "RGB", str(tmp_path), "p", layout, 128, "png", 95)) as f:
+        man = json.load(f)
+    top = man["levels"][-1]
+    assert (top["width"], top["height"]) == (700, 300)
+    z0 = man["levels"][0]
+    if layout == "dzi":
+        assert man["max_level"] == 10 and (z0["width"], z0["height"]) == (1, 1)
+    else:
+        # z=0 : une seule tuile couvrant toute l'image, puis 2x par niveau
+        assert (z0["cols"], z0["rows"]) == (1, 1) and max(z0["width"], z0["height"]) <= 128
+        assert (man["minzoom"], man["maxzoom"]) == (0, 3) and man["max_level"] == 3
+        assert os.path.isfile(os.path.join(man["root"], "0", "0", "0.png"))
+        assert not os.path.exists(os.path.join(man["root"], "4"))
+
+
+def test_incremental_cache_per_folder_and_fallback(mosaic, tmp_path, monkeypatch):
+    # un cache par dossier source ; une tuile modifiée = résultat d'un assemblage complet ;
+    # toutes les tuiles modifiées = ré-assemblage complet plutôt que la boucle incrémentale
+    from PIL import Image
+    monkeypatch.chdir(tmp_path)
+    node = mosaic.MosaicAssembleFromFolder()
+    kw = dict(overlap_x=16, overlap_y=16, overlap_blend="feather_linear", feather_px=8,
+              export=False, incremental=True, workers=1)
+
+    def write(folder, seed):
+        folder.mkdir(exist_ok=True)
+        for i in range(16):
+            Image.fromarray(_noise(64, 64, seed=seed + i)).save(str(folder / f"t{i:02d}.png"))
+
+    a, b = tmp_path / "a", tmp_path / "b"
+    write(a, 0)
+    write(b, 100)
+    node.assemble_from_folder(str(a), "*.png", 4, 4, **kw)
+    node.assemble_from_folder(str(b), "*.png", 4, 4, **kw)
+    assert len(list((tmp_path / "output" / "tiles").glob("*.mosaic"))) == 2
+
+    Image.fromarray(_noise(64, 64, seed=999)).save(str(a / "t00.png"))
+    img, _, stats = node.assemble_from_folder(str(a), "*.png", 4, 4, **kw)
+    assert "1/16" in stats and "complet" not in stats
+    ref, _, _ = node.assemble_from_folder(str(a), "*.png", 4, 4, **dict(kw, incremental=False))
+    np.testing.assert_array_equal(img.numpy(), ref.numpy())
+
+    write(a, 500)
+    img, _, stats = node.assemble_from_folder(str(a), "*.png", 4, 4, **kw)
+    assert "16/16" in stats and "complet" in stats
+    ref, _, _ = node.assemble_from_folder(str(a), "*.png", 4, 4, **dict(kw, incremental=False))
+    np.testing.assert_array_equal(img.numpy(), ref.numpy())